@@ -1,12 +1,25 @@
 """The Zyxel integration."""
 import asyncio
 import logging
+import time
+
+_IMPORT_STARTED = time.perf_counter()
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+import homeassistant.helpers.config_validation as cv
 from .coordinator import ZyxelDataUpdateCoordinator
+from .metrics import async_setup_metrics
+from .scheduler import PollScheduler
+from .services import async_setup_services
 from .const import *
 
+# Seconds spent importing the integration modules, reported in diagnostics
+IMPORT_DURATION = time.perf_counter() - _IMPORT_STARTED
+
 _LOGGER = logging.getLogger(__name__)
 
 # Block excessive nr7101 debug logging
@@ -14,8 +27,26 @@ _LOGGER = logging.getLogger(__name__)
 #nr7101_logger.setLevel(logging.WARNING)
 
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Zyxel services and the poll scheduler shared by all entries."""
+    scheduler = PollScheduler(hass)
+    hass.data.setdefault(DOMAIN, {})["scheduler"] = scheduler
+
+    @callback
+    def _async_stop(event: Event) -> None:
+        scheduler.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Zyxel integration from a config entry."""
+    started = time.perf_counter()
 
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})    
@@ -23,13 +54,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator = ZyxelDataUpdateCoordinator(hass, entry=entry)
     entry.runtime_data = coordinator
 
-    await coordinator.async_config_entry_first_refresh()
+    # With a restored snapshot the entities are created right away and the
+    # first live refresh runs in the background, so a router that is still
+    # attaching does not hold up startup
+    await coordinator.handovers.async_load()
+    await coordinator.usage.async_load()
+    if coordinator.statistics is not None:
+        await coordinator.statistics.async_load()
+    restored = await coordinator.async_restore_snapshot()
+    if not restored:
+        await coordinator.async_config_entry_first_refresh()
+    refreshed = time.perf_counter()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    async def _async_stop(event: Event) -> None:
+        # Entries are not unloaded on shutdown, write what is otherwise only saved every few minutes
+        await _async_save(coordinator)
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
+
+    if entry.options.get(CONF_METRICS):
+        async_setup_metrics(hass)
+
+    # From a snapshot, the first live refresh is started by the scheduler in the background
+    entry.async_on_unload(coordinator.scheduler.async_register(coordinator, refresh=restored))
+
+    if CONF_UNSUPPORTED not in entry.data:
+        # Entries created before the config flow probed the oids poll all of them, probe them once
+        entry.async_create_background_task(
+            hass, coordinator.async_probe_unsupported(), f"{DOMAIN}_probe_{entry.entry_id}"
+        )
+
+    coordinator.timings = {
+        "import": round(IMPORT_DURATION, 4),
+        "first_refresh": round(refreshed - started, 4),
+        "setup": round(time.perf_counter() - started, 4),
+    }
+    _LOGGER.debug("Zyxel setup timings for %s: %s", entry.title, coordinator.timings)
+
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options live instead of reloading the entry."""
+    coordinator: ZyxelDataUpdateCoordinator = entry.runtime_data
+    if coordinator:
+        coordinator.apply_options()
+    if entry.options.get(CONF_METRICS):
+        async_setup_metrics(hass)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""    
     coordinator: ZyxelDataUpdateCoordinator = entry.runtime_data
@@ -38,8 +115,25 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         entry.runtime_data = None
+
+    await _async_save(coordinator)
     
     await coordinator.router.close()
     return unload_ok
 
 
+async def _async_save(coordinator: ZyxelDataUpdateCoordinator) -> None:
+    """Import the statistics hour in progress and write it and the usage totals."""
+    if coordinator.statistics is not None:
+        # Kept, the samples after a restart within the hour are added to it
+        coordinator.statistics.async_flush(keep=True)
+        await coordinator.statistics.async_save()
+    await coordinator.usage.async_save()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and history when the entry is deleted."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.handovers").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.usage").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.statistics").async_remove()
@@ -1,12 +1,36 @@
 """Config flow for Zyxel integration."""
+import asyncio
 import logging
 
 import voluptuous as vol
 
 from homeassistant import config_entries, core, exceptions
-from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
-
-from .const import DEFAULT_HOST, DEFAULT_USERNAME, DOMAIN
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_SCAN_INTERVAL, CONF_TIMEOUT, CONF_USERNAME
+from homeassistant.core import callback
+
+from .const import (
+    CONF_BILLING_DAY,
+    CONF_CAPTURE,
+    CONF_ENCRYPTION,
+    CONF_MAX_CONCURRENT,
+    CONF_METRICS,
+    CONF_POLL_TIMEOUT,
+    CONF_RETRIES,
+    CONF_STALE_TIMEOUT,
+    CONF_STATISTICS,
+    CONF_UNSUPPORTED,
+    DEFAULT_BILLING_DAY,
+    DEFAULT_HOST,
+    DEFAULT_MAX_CONCURRENT,
+    DEFAULT_POLL_TIMEOUT,
+    DEFAULT_RETRIES,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STALE_TIMEOUT,
+    DEFAULT_TIMEOUT,
+    DEFAULT_USERNAME,
+    DOMAIN,
+    PROBE_TIMEOUT,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,28 +49,78 @@ DATA_SCHEMA = vol.Schema(
 )
 
 
-async def validate_input(hass: core.HomeAssistant, data):
-    """Validate that the user input allows us to connect."""
-
-    # Create router instance and test connection
-    router = nr7101.NR7101(
-        data[CONF_HOST],
-        data[CONF_USERNAME],
-        data[CONF_PASSWORD]
-    )
-        
+def _candidate_urls(host: str) -> list[str]:
+    """Return the https and http variants of host, the scheme typed by the user first."""
+    bare = host.split("://", 1)[-1].rstrip("/")
+    urls = [f"https://{bare}", f"http://{bare}"]
+    if host.startswith("http://"):
+        urls.reverse()
+    return urls
+
+
+async def _probe(url, data) -> nr7101.NR7101:
+    """Check a single url with /GetInfoNoLogin and /getRSAPublickKey only."""
+    router = nr7101.NR7101(url, data[CONF_USERNAME], data[CONF_PASSWORD])
     try:
-        await router.login()
-        login_success = await router.get_status()
-        if not login_success:
-            raise Exception("Login failed - check credentials")
+        async with asyncio.timeout(PROBE_TIMEOUT):
+            await router.probe()
+    except BaseException:
         await router.close()
-    except Exception as ex:
+        raise
+    return router
+
+
+async def detect_router(data) -> nr7101.NR7101:
+    """Probe the http and https variants concurrently, return the first that responds."""
+    tasks = [asyncio.create_task(_probe(url, data)) for url in _candidate_urls(data[CONF_HOST])]
+    router = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                router = await next_done
+                break
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("Zyxel probe failed: %s", ex)
+    finally:
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Close the routers of probes that also succeeded but lost the race
+        for result in results:
+            if isinstance(result, nr7101.NR7101) and result is not router:
+                await result.close()
+
+    if router is None:
+        raise ConnectionError("No scheme answered")
+    return router
+
+
+async def validate_input(hass: core.HomeAssistant, data):
+    """Validate that the user input allows us to connect.
+
+    The detected url, encryption mode and unsupported oids are written back
+    into data, so the first refresh does not repeat the discovery.
+    """
+    router = await detect_router(data)
+
+    try:
+        try:
+            await router.login()
+        except Exception as ex:
+            _LOGGER.error("Unable to login to Zyxel device: %s" % ex)
+            raise InvalidAuth from ex
+
+        status_oids = [oid for oid, _ in nr7101.STATUS_ENDPOINTS]
+        unsupported = await router.probe_unsupported_endpoints(status_oids)
+        if len(unsupported) == len(status_oids):
+            raise ConnectionError("No status endpoint is supported")
+    finally:
         await router.close()
-        _LOGGER.error("Unable to connect to Zyxel device: %s" % ex)
-        raise ConnectionError from ex
 
-    return {"title": f"Zyxel device: ({data[CONF_HOST]})"}
+    data[CONF_HOST] = router.url
+    data[CONF_ENCRYPTION] = router.encryption_required
+    data[CONF_UNSUPPORTED] = unsupported
+    return {"title": f"Zyxel device: ({router.url})"}
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -58,42 +132,79 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
-        success = False
 
         if user_input is not None:
-            host = user_input[CONF_HOST]
-
-            # sanitize entry
-            if not host.startswith("http://") and not host.startswith("https://"):
-                host = f"https://{host}"
-                user_input[CONF_HOST] = host
-
             try:
                 info = await validate_input(self.hass, user_input)
-                success = True
-            except Exception as e:  # pylint: disable=broad-except
-                _LOGGER.exception("First attempt failed", e)
+            except ConnectionError:
                 errors["base"] = "cannot_connect"
-
-            if not success and "https" not in user_input["host"]:
-                _LOGGER.info("User specified http but it failed, trying https...")
-                user_input["host"] = user_input["host"].replace("http://", "https://")
-                try:
-                    info = await validate_input(self.hass, user_input)
-                    success = True
-                except ConnectionError:
-                    errors["base"] = "cannot_connect"
-                except Exception as e:  # pylint: disable=broad-except
-                    _LOGGER.exception("Second attempt failed", e)
-                    errors["base"] = "unknown"
-
-        if success:
-            return self.async_create_entry(title=info["title"], data=user_input)
-        else:
-            return self.async_show_form(
-                step_id="user", data_schema=DATA_SCHEMA, errors=errors
-            )
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error while setting up Zyxel device")
+                errors["base"] = "unknown"
+            else:
+                return self.async_create_entry(title=info["title"], data=user_input)
+
+        return self.async_show_form(
+            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlow()
+
+
+class OptionsFlow(config_entries.OptionsFlow):
+    """Handle the polling options of a Zyxel device, applied without a reload."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            # A shorter window would expire the values of an endpoint missing a single poll
+            if user_input[CONF_STALE_TIMEOUT] < user_input[CONF_SCAN_INTERVAL]:
+                errors[CONF_STALE_TIMEOUT] = "stale_timeout_too_short"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_SCAN_INTERVAL, default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Required(
+                    CONF_TIMEOUT, default=options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+                vol.Required(
+                    CONF_POLL_TIMEOUT, default=options.get(CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                vol.Required(
+                    CONF_MAX_CONCURRENT, default=options.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=9)),
+                vol.Required(
+                    CONF_RETRIES, default=options.get(CONF_RETRIES, DEFAULT_RETRIES)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+                vol.Required(
+                    CONF_STALE_TIMEOUT, default=options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_BILLING_DAY, default=options.get(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=31)),
+                vol.Required(CONF_METRICS, default=options.get(CONF_METRICS, False)): bool,
+                vol.Required(CONF_STATISTICS, default=options.get(CONF_STATISTICS, False)): bool,
+                vol.Required(CONF_CAPTURE, default=options.get(CONF_CAPTURE, False)): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
 
 
 class ConnectionError(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
+
+
+class InvalidAuth(exceptions.HomeAssistantError):
+    """Error to indicate the credentials were refused."""
@@ -1,9 +1,4 @@
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    SensorEntity,
-    SensorStateClass,
-)
-from homeassistant.helpers.entity import EntityCategory
+from functools import cache
 
 
 DOMAIN = "ha_zyxel"
@@ -11,196 +6,283 @@ DEFAULT_NAME = "Zyxel Device"
 DEFAULT_HOST = "https://192.168.1.1"
 DEFAULT_USERNAME = "admin"
 DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_TIMEOUT = 10
+DEFAULT_POLL_TIMEOUT = 15
+DEFAULT_MAX_CONCURRENT = 1
+DEFAULT_RETRIES = 2
+DEFAULT_STALE_TIMEOUT = 300
+
+# Polls of all entries are staggered, with a shared limit of in-flight requests
+GLOBAL_MAX_CONCURRENT = 4
+POLL_JITTER = 2.0
+# The first refresh of entries restored from a snapshot is spread over this
+# many seconds after startup (or their interval if shorter), at their phase
+FIRST_POLL_WINDOW = 30
+
+# Storage of the last good snapshot, restored at startup
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 5
+
+# Serving cell handover history
+HANDOVER_HISTORY_SIZE = 1000
+HANDOVER_SAVE_DELAY = 60
+EVENT_CELL_HANDOVER = f"{DOMAIN}_cell_handover"
+
+# Router reboots, detected from the uptime. Across a restart of HA a reboot is
+# told from the restart time moving by more than the tolerance (seconds)
+EVENT_ROUTER_REBOOTED = f"{DOMAIN}_router_rebooted"
+REBOOT_TOLERANCE = 60
+
+# Data usage totals, written to storage every USAGE_SAVE_DELAY seconds at most
+DEFAULT_BILLING_DAY = 1
+USAGE_SAVE_DELAY = 300
+
+# Hour of statistics in progress, written to storage every STATISTICS_SAVE_DELAY seconds at most
+STATISTICS_SAVE_DELAY = 300
+
+# Raw payload history kept for diagnostics, per endpoint and in total (compressed bytes)
+RAW_HISTORY_SIZE = 20
+RAW_HISTORY_MAX_BYTES = 256 * 1024
+
+# List valued sections flattened to index keys (e.g. cellular.SCC_Info.0.Band),
+# other lists are kept as values
+FLATTEN_EXPAND_LISTS = ("cellular.SCC_Info",)
+
+# CPU-bound work moved off the event loop: answers of at least this many bytes
+# are decrypted and parsed in an executor, and the flatten once it took longer
+# than this many seconds on the loop
+DECODE_OFFLOAD_BYTES = 16 * 1024
+FLATTEN_OFFLOAD_SECONDS = 0.005
 
 CONF_HOST = "host"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
+# Discovered by the config flow and cached in the entry
+CONF_ENCRYPTION = "encryption_required"
+# Status oids the router answered with a 404 or an error result, never polled
+CONF_UNSUPPORTED = "unsupported_endpoints"
+
+# Options, scan interval and per-request timeout use CONF_SCAN_INTERVAL and CONF_TIMEOUT
+CONF_POLL_TIMEOUT = "poll_timeout"
+CONF_MAX_CONCURRENT = "max_concurrent_requests"
+CONF_RETRIES = "retries"
+# Seconds the last good value of an endpoint is served after it stops answering
+CONF_STALE_TIMEOUT = "stale_timeout"
+# Serve the router in the OpenMetrics endpoint
+CONF_METRICS = "metrics"
+# Import hourly signal and traffic rate statistics into the recorder
+CONF_STATISTICS = "statistics"
+# Record the requests into a fixture archive, included in the diagnostics
+CONF_CAPTURE = "capture"
+CAPTURE_MAX_RECORDS = 500
+# First day of the month of the data usage billing cycle
+CONF_BILLING_DAY = "billing_day"
+
+METRICS_URL = "/api/ha_zyxel/metrics"
+
+# profile_poll service
+SERVICE_PROFILE_POLL = "profile_poll"
+ATTR_CPROFILE = "cprofile"
+PROFILE_STATS_LINES = 40
+
+# Seconds allowed for the config flow reachability probe of each scheme
+PROBE_TIMEOUT = 10
 
 
 PLATFORMS = ["sensor", "button"]
 
 
-# Define some known sensor types for proper configuration
-KNOWN_SENSORS = {
-    "INTF_RSSI": {
-        "name": "Cellular RSSI",
-        "unit": "dBm",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_PhyCell_ID": {
-        "name": "Physical Cell ID",
-        "unit": None,
-        "icon": "mdi:antenna",
-        "device_class": None,
-        "state_class": None,
-    },
-    "cellular.INTF_Cell_ID": {
-        "name": "Cellular Cell ID",
-        "unit": None,
-        "icon": "mdi:antenna",
-        "device_class": None,
-        "state_class": None,
-    },
-    "cellular.INTF_Current_Band": {
-        "name": "Cellular Current Band",
-        "unit": None,
-        "icon": "mdi:antenna",
-        "device_class": None,
-        "state_class": None,
-    },
-    "INTF_RSRP": {
-        "name": "Cellular Reference Signal Received Power",
-        "unit": "dBm",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_RSRQ": {
-        "name": "Cellular Reference Signal Received Quality",
-        "unit": "dB",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_SINR": {
-        "name": "Cellular Signal-to-Noise Ratio",
-        "unit": "dB",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_MCS": {
-        "name": "Cellular Modulation and Coding Scheme",
-        "unit": "",
-        "icon": "mdi:signal",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_CQI": {
-        "name": "Cellular Channel Quality Indicator",
-        "unit": "",
-        "icon": "mdi:signal",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_RI": {
-        "name": "Cellular Rank Indicator",
-        "unit": "",
-        "icon": "mdi:signal",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "INTF_PMI": {
-        "name": "Cellular Precoding Matrix Indicator",
-        "unit": "",
-        "icon": "mdi:signal",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-    },
-    "cellular.NSA_Band": {
-        "name": "NSA Band",
-        "unit": None,
-        "icon": "mdi:antenna",
-        "device_class": None,
-        "state_class": None,
-    },
-    "NSA_PhyCellID": {
-        "name": "NSA Physical Cell ID",
-        "unit": None,
-        "icon": "mdi:antenna",
-        "device_class": None,
-        "state_class": None,
-    },
-    "NSA_RSRP": {
-        "name": "NSA Reference Signal Received Power",
-        "unit": "dBm",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT
-    },
-    "NSA_RSRQ": {
-        "name": "NSA Reference Signal Received Quality",
-        "unit": "dB",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT
-    },
-    "NSA_RSSI": {
-        "name": "NSA Reference Signal Strength Indicator",
-        "unit": "dBm",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT
-    },
-    "NSA_SINR": {
-        "name": "NSA Signal-to-Noise Ratio",
-        "unit": "dB",
-        "icon": "mdi:signal",
-        "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
-        "state_class": SensorStateClass.MEASUREMENT
-    },
-    "X_ZYXEL_TEMPERATURE_AMBIENT": {
-        "name": "Ambient Temperature",
-        "unit": "°C",
-        "icon": "mdi:thermometer",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "category": EntityCategory.DIAGNOSTIC
-    },
-    "X_ZYXEL_TEMPERATURE_SDX": {
-        "name": "SDX Temperature",
-        "unit": "°C",
-        "icon": "mdi:thermometer",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "category": EntityCategory.DIAGNOSTIC
-    },
-    "X_ZYXEL_TEMPERATURE_CPU0": {
-        "name": "CPU Temperature",
-        "unit": "°C",
-        "icon": "mdi:thermometer",
-        "device_class": SensorDeviceClass.TEMPERATURE,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "category": EntityCategory.DIAGNOSTIC
-    },
-    "sms.SMS_UsedSpace": {
-        "name": "SMS UsedSpace",
-        "unit": None,
-        "icon": "mdi:mail",
-        "device_class": None,
-        "state_class": None,
-    },
-    "device.ProcessStatus.CPUUsage": {
-        "name": "CPU Usage",
-        "unit": "%",
-        "icon": "mdi:cpu-64-bit",
-        "device_class": None,
-        "state_class": SensorStateClass.MEASUREMENT,
-        "category": EntityCategory.DIAGNOSTIC
-    },
-    "device.DeviceInfo.UpTime": {
-        "name": "UpTime",
-        "unit": "s",
-        "icon": "mdi:clock-outline",
-        "device_class": SensorDeviceClass.DURATION,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-        "category": EntityCategory.DIAGNOSTIC,
-        "disabled": True
-    },
-    "BytesSent": {
-        #"name": "Bytes Sent",
-        "unit": "B",
-        "icon": "mdi:numeric-10-box",
-        "device_class": SensorDeviceClass.DATA_SIZE,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    "BytesReceived": {
-        #"name": "Bytes Received",
-        "unit": "B",
-        "icon": "mdi:numeric-10-box",
-        "device_class": SensorDeviceClass.DATA_SIZE,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-}
+@cache
+def get_known_sensors() -> dict:
+    """Return the known sensor types, built on first use.
+
+    The table pulls in the sensor component enums, so it is not built when
+    the integration is merely imported.
+    """
+    from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+    from homeassistant.helpers.entity import EntityCategory
+
+    # Define some known sensor types for proper configuration
+    return {
+        "INTF_RSSI": {
+            "name": "Cellular RSSI",
+            "unit": "dBm",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_PhyCell_ID": {
+            "name": "Physical Cell ID",
+            "unit": None,
+            "icon": "mdi:antenna",
+            "device_class": None,
+            "state_class": None,
+        },
+        "cellular.INTF_Cell_ID": {
+            "name": "Cellular Cell ID",
+            "unit": None,
+            "icon": "mdi:antenna",
+            "device_class": None,
+            "state_class": None,
+        },
+        "cellular.INTF_Current_Band": {
+            "name": "Cellular Current Band",
+            "unit": None,
+            "icon": "mdi:antenna",
+            "device_class": None,
+            "state_class": None,
+        },
+        "INTF_RSRP": {
+            "name": "Cellular Reference Signal Received Power",
+            "unit": "dBm",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_RSRQ": {
+            "name": "Cellular Reference Signal Received Quality",
+            "unit": "dB",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_SINR": {
+            "name": "Cellular Signal-to-Noise Ratio",
+            "unit": "dB",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_MCS": {
+            "name": "Cellular Modulation and Coding Scheme",
+            "unit": "",
+            "icon": "mdi:signal",
+            "device_class": None,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_CQI": {
+            "name": "Cellular Channel Quality Indicator",
+            "unit": "",
+            "icon": "mdi:signal",
+            "device_class": None,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_RI": {
+            "name": "Cellular Rank Indicator",
+            "unit": "",
+            "icon": "mdi:signal",
+            "device_class": None,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "INTF_PMI": {
+            "name": "Cellular Precoding Matrix Indicator",
+            "unit": "",
+            "icon": "mdi:signal",
+            "device_class": None,
+            "state_class": SensorStateClass.MEASUREMENT,
+        },
+        "cellular.NSA_Band": {
+            "name": "NSA Band",
+            "unit": None,
+            "icon": "mdi:antenna",
+            "device_class": None,
+            "state_class": None,
+        },
+        "NSA_PhyCellID": {
+            "name": "NSA Physical Cell ID",
+            "unit": None,
+            "icon": "mdi:antenna",
+            "device_class": None,
+            "state_class": None,
+        },
+        "NSA_RSRP": {
+            "name": "NSA Reference Signal Received Power",
+            "unit": "dBm",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT
+        },
+        "NSA_RSRQ": {
+            "name": "NSA Reference Signal Received Quality",
+            "unit": "dB",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT
+        },
+        "NSA_RSSI": {
+            "name": "NSA Reference Signal Strength Indicator",
+            "unit": "dBm",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT
+        },
+        "NSA_SINR": {
+            "name": "NSA Signal-to-Noise Ratio",
+            "unit": "dB",
+            "icon": "mdi:signal",
+            "device_class": SensorDeviceClass.SIGNAL_STRENGTH,
+            "state_class": SensorStateClass.MEASUREMENT
+        },
+        "X_ZYXEL_TEMPERATURE_AMBIENT": {
+            "name": "Ambient Temperature",
+            "unit": "°C",
+            "icon": "mdi:thermometer",
+            "device_class": SensorDeviceClass.TEMPERATURE,
+            "state_class": SensorStateClass.MEASUREMENT,
+            "category": EntityCategory.DIAGNOSTIC
+        },
+        "X_ZYXEL_TEMPERATURE_SDX": {
+            "name": "SDX Temperature",
+            "unit": "°C",
+            "icon": "mdi:thermometer",
+            "device_class": SensorDeviceClass.TEMPERATURE,
+            "state_class": SensorStateClass.MEASUREMENT,
+            "category": EntityCategory.DIAGNOSTIC
+        },
+        "X_ZYXEL_TEMPERATURE_CPU0": {
+            "name": "CPU Temperature",
+            "unit": "°C",
+            "icon": "mdi:thermometer",
+            "device_class": SensorDeviceClass.TEMPERATURE,
+            "state_class": SensorStateClass.MEASUREMENT,
+            "category": EntityCategory.DIAGNOSTIC
+        },
+        "sms.SMS_UsedSpace": {
+            "name": "SMS UsedSpace",
+            "unit": None,
+            "icon": "mdi:mail",
+            "device_class": None,
+            "state_class": None,
+        },
+        "device.ProcessStatus.CPUUsage": {
+            "name": "CPU Usage",
+            "unit": "%",
+            "icon": "mdi:cpu-64-bit",
+            "device_class": None,
+            "state_class": SensorStateClass.MEASUREMENT,
+            "category": EntityCategory.DIAGNOSTIC
+        },
+        "device.DeviceInfo.UpTime": {
+            "name": "UpTime",
+            "unit": "s",
+            "icon": "mdi:clock-outline",
+            "device_class": SensorDeviceClass.DURATION,
+            "state_class": SensorStateClass.TOTAL_INCREASING,
+            "category": EntityCategory.DIAGNOSTIC,
+            "disabled": True
+        },
+        "BytesSent": {
+            #"name": "Bytes Sent",
+            "unit": "B",
+            "icon": "mdi:numeric-10-box",
+            "device_class": SensorDeviceClass.DATA_SIZE,
+            "state_class": SensorStateClass.TOTAL_INCREASING,
+        },
+        "BytesReceived": {
+            #"name": "Bytes Received",
+            "unit": "B",
+            "icon": "mdi:numeric-10-box",
+            "device_class": SensorDeviceClass.DATA_SIZE,
+            "state_class": SensorStateClass.TOTAL_INCREASING,
+        },
+    }
@@ -1,19 +1,27 @@
 """AMC alarm integration."""
 import asyncio
 import logging
-import async_timeout
-from datetime import timedelta
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_SCAN_INTERVAL, CONF_TIMEOUT
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady, ConfigEntryError
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 from .const import *
 
-from .nr7101.nr7101 import NR7101
+from .flattener import SnapshotFlattener
+from .handover import HandoverTracker
+from .statistics import StatisticsAggregator
+from .usage import UsageTracker
+from .nr7101.nr7101 import NR7101, STATUS_ENDPOINTS
+from .nr7101.profiler import PollProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,15 +30,98 @@ class ZyxelDataUpdateCoordinator(DataUpdateCoordinator):
 
     router: NR7101 | None = None
     config: ConfigType | None = None
+    timings: dict | None = None
+    # Set while profile_poll runs an instrumented refresh, with its last result
+    profiler: PollProfiler | None = None
+    last_profile: dict | None = None
     
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize."""
         self.hass = hass
         self.entry = entry
-        self.config = (entry.data or {}).copy()
+        self.config = {**(entry.data or {}), **(entry.options or {})}
         self._device_info = None  # sarà creato solo la prima volta        
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL))
-        self.router = NR7101(self.config[CONF_HOST], self.config[CONF_USERNAME], self.config[CONF_PASSWORD])
+        # Polls are driven by the domain PollScheduler, not by a timer of each coordinator
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=None)
+        self.scheduler = hass.data[DOMAIN]["scheduler"]
+        self.router = NR7101(
+            self.config[CONF_HOST], self.config[CONF_USERNAME], self.config[CONF_PASSWORD],
+            unsupported=self.config.get(CONF_UNSUPPORTED),
+            encryption_required=self.config.get(CONF_ENCRYPTION),
+            timeout=self.get_config(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+            max_concurrent=self.get_config(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+            retries=self.get_config(CONF_RETRIES, DEFAULT_RETRIES),
+            limiter=self.scheduler.limiter,
+            history_size=RAW_HISTORY_SIZE,
+            history_max_bytes=RAW_HISTORY_MAX_BYTES,
+            offload_threshold=DECODE_OFFLOAD_BYTES,
+        )
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self.handovers = HandoverTracker(hass, entry)
+        self.flattener = SnapshotFlattener(FLATTEN_EXPAND_LISTS)
+        # Duration of the latest flatten, deciding where the next one runs
+        self._flatten_seconds = 0.0
+        self.usage = UsageTracker(hass, entry, self.get_config(CONF_BILLING_DAY, DEFAULT_BILLING_DAY))
+        self.statistics: StatisticsAggregator | None = None
+        if self.get_config(CONF_STATISTICS, False):
+            self.statistics = StatisticsAggregator(hass, entry)
+        if self.get_config(CONF_CAPTURE, False):
+            self.router.start_capture(CAPTURE_MAX_RECORDS)
+        # Endpoint groups ("cellular", "traffic", ...) with the monotonic time they
+        # were last received, and the groups that answered the latest poll
+        self._group_updated: dict[str, float] = {}
+        self._fresh_groups: set[str] = set()
+        # Poll instrumentation, reported in diagnostics and metrics
+        self.poll_stats = {"polls": 0, "failures": 0, "duration": None, "last_success": None}
+        # Router uptime of the latest poll and the restart time derived from it,
+        # persisted with the snapshot. _uptime_live is set once an uptime was polled
+        # by this run, before that uptime comes from storage
+        self.uptime: int | None = None
+        self.last_restart: datetime | None = None
+        self._uptime_live = False
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the last good snapshot from storage, marking it stale."""
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        self.uptime = stored.get("uptime")
+        if stored.get("last_restart"):
+            self.last_restart = dt_util.parse_datetime(stored["last_restart"])
+        if not stored.get("data"):
+            return False
+        self.data = stored["data"]
+        # Served as stale until the first live refresh, within the staleness window
+        now = time.monotonic()
+        self._group_updated = {_group_of(key): now for key in self.data}
+        self._fresh_groups = set()
+        _LOGGER.debug("Restored Zyxel snapshot from %s", stored.get("updated"))
+        return True
+
+    def is_stale(self, key: str) -> bool:
+        """Return True if the value of key was not refreshed by the latest poll."""
+        return _group_of(key) not in self._fresh_groups
+
+    def is_expired(self, key: str) -> bool:
+        """Return True if the value of key is older than the staleness window.
+
+        A value refreshed by the latest poll never is, whatever the window.
+        """
+        group = _group_of(key)
+        if group in self._fresh_groups:
+            return False
+        updated = self._group_updated.get(group)
+        if updated is None:
+            return True
+        return time.monotonic() - updated > self.get_config(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+
+    def _snapshot_to_store(self) -> dict:
+        return {
+            "updated": dt_util.utcnow().isoformat(),
+            "data": self.data,
+            "uptime": self.uptime,
+            "last_restart": self.last_restart.isoformat() if self.last_restart else None,
+        }
     
     @property
     def device_available(self):
@@ -59,62 +150,256 @@ class ZyxelDataUpdateCoordinator(DataUpdateCoordinator):
             )
         return self._device_info
 
+    @property
+    def poll_interval(self) -> float:
+        """Seconds between two polls of this router."""
+        return self.get_config(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+
     def get_config(self, key, default=None):
         if not key in self.config:
             return default
         value = self.config[key]
         return value
 
+    def apply_options(self) -> None:
+        """Apply changed options to the running coordinator, without a reload."""
+        self.config = {**(self.entry.data or {}), **(self.entry.options or {})}
+        self.scheduler.async_reschedule()
+        self.usage.billing_day = self.get_config(CONF_BILLING_DAY, DEFAULT_BILLING_DAY)
+        self.router.configure(
+            timeout=self.get_config(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+            max_concurrent=self.get_config(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+            retries=self.get_config(CONF_RETRIES, DEFAULT_RETRIES),
+        )
+        if self.get_config(CONF_STATISTICS, False):
+            if self.statistics is None:
+                self.statistics = StatisticsAggregator(self.hass, self.entry)
+        elif self.statistics is not None:
+            self.statistics.async_flush()
+            self.statistics = None
+        if self.get_config(CONF_CAPTURE, False):
+            if self.router.capture is None:
+                self.router.start_capture(CAPTURE_MAX_RECORDS)
+        else:
+            self.router.stop_capture()
+        _LOGGER.debug("Zyxel options applied: %s", self.entry.options)
+
     async def _async_update_data(self):
+        started = time.monotonic()
+        try:
+            data = await self._async_poll()
+        except Exception:
+            self.poll_stats["failures"] += 1
+            raise
+        else:
+            self.poll_stats["last_success"] = time.time()
+        finally:
+            self.poll_stats["polls"] += 1
+            self.poll_stats["duration"] = round(time.monotonic() - started, 3)
+        return data
+
+    async def _async_poll(self):
         router = self.router
         hass = self.hass
         
         if router.sessionkey is None:
             try:
-                await router.login()
+                # Under the login lock, a concurrent request may be logging in already
+                await router._relogin(None)
             except Exception as ex:
-                _LOGGER.error("Could not connect to Zyxel router: %s" % ex)
-                raise ConfigEntryNotReady from ex
+                self._async_notify_expired()
+                # UpdateFailed becomes ConfigEntryNotReady on the first refresh,
+                # and is handled normally when refreshing in the background
+                raise UpdateFailed(f"Could not connect to Zyxel router: {ex}") from ex
 
         """Fetch data from the router."""
         try:
-            async with async_timeout.timeout(15):
-                data = await router.get_status()
-
-                if not data:
-                    raise UpdateFailed("No data received from router")
-                router.last_status_data = data
-
-                # Get device info if not already in data
-                if "device" not in data or not data["device"]:
-                    device_info = await router.get_json_object("status")
-                    if device_info:
-                        data["device"] = device_info
-                    else:
-                        raise UpdateFailed("No device data received from router")
-                
-                #for get device as first
-                new_data = { "device": data["device"] }
-                new_data.update(data)
-
-                flat_data = _flatten_dict(new_data)
-
-                return flat_data
-        except asyncio.TimeoutError:
-            router._session_valid = False
-            raise UpdateFailed("Router data fetch timed out")
+            data = await router.get_status(deadline=self.get_config(CONF_POLL_TIMEOUT, DEFAULT_POLL_TIMEOUT))
         except Exception as err:
-            router._session_valid = False
+            self._async_notify_expired()
             raise UpdateFailed(f"Error communicating with router: {err}") from err
 
+        if not data:
+            self._async_notify_expired()
+            raise UpdateFailed("No data received from router")
+        router.last_status_data = data
 
-def _flatten_dict(d: dict, parent_key: str = "") -> dict:
-    """Flatten a nested dictionary with dot notation for keys."""
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}.{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(_flatten_dict(v, new_key).items())
-        else:
-            items.append((new_key, v))
-    return dict(items)
\ No newline at end of file
+        # Get device info if not already in data
+        if not data.get("device") and self.is_expired("device"):
+            try:
+                device_info = await router.get_json_object("status")
+            except Exception as err:
+                _LOGGER.debug("Error fetching Zyxel device status: %s", err)
+                device_info = None
+            if device_info:
+                data["device"] = device_info
+            else:
+                self._async_notify_expired()
+                raise UpdateFailed("No device data received from router")
+
+        now = time.monotonic()
+        self._fresh_groups = {group for group, value in data.items() if value}
+        for group in self._fresh_groups:
+            self._group_updated[group] = now
+
+        #for get device as first
+        new_data = { "device": data.get("device") or {} }
+        new_data.update(data)
+
+        with self.profiler.stage("flatten") if self.profiler else nullcontext():
+            if self._flatten_seconds >= FLATTEN_OFFLOAD_SECONDS:
+                # Too slow for the event loop last time
+                flat_data, self._flatten_seconds = await self.hass.async_add_executor_job(
+                    _timed, self.flattener.flatten, new_data
+                )
+                self.router.blocking.add("flatten", 0, offloaded=True)
+            else:
+                flat_data, self._flatten_seconds = _timed(self.flattener.flatten, new_data)
+                self.router.blocking.add("flatten", self._flatten_seconds)
+
+        # Keep serving the last good values of the groups missing from this
+        # poll, until they are older than the staleness window
+        for key, value in (self.data or {}).items():
+            if key not in flat_data and self.is_stale(key) and not self.is_expired(key):
+                flat_data[key] = value
+
+        # Before the statistics, a reboot resets their counter baselines
+        if "device" in self._fresh_groups:
+            self._async_track_uptime(flat_data.get("device.DeviceInfo.UpTime"))
+        if "cellular" in self._fresh_groups:
+            self.handovers.async_update(flat_data)
+        if "traffic" in self._fresh_groups:
+            self.usage.async_update(flat_data)
+        if self.statistics is not None:
+            self.statistics.async_update(flat_data, self._fresh_groups)
+
+        # The snapshot is read back from self.data once the write runs
+        self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_DELAY)
+
+        return flat_data
+
+    @callback
+    def _async_track_uptime(self, uptime) -> None:
+        """Update the restart time from the uptime, handling a reboot once per refresh."""
+        try:
+            uptime = int(float(uptime))
+        except (TypeError, ValueError):
+            return
+        previous, self.uptime = self.uptime, uptime
+        restart = dt_util.utcnow() - timedelta(seconds=uptime)
+        live, self._uptime_live = self._uptime_live, True
+        if previous is None or self.last_restart is None:
+            self.last_restart = restart
+            return
+
+        rebooted = uptime < previous
+        if not live:
+            # HA was down, the router may have rebooted and be up longer than before
+            rebooted = rebooted or restart - self.last_restart > timedelta(seconds=REBOOT_TOLERANCE)
+        if not rebooted:
+            return
+
+        _LOGGER.info("Zyxel router %s rebooted at %s", self.entry.title, restart.isoformat())
+        previous_restart, self.last_restart = self.last_restart, restart
+        # Counters started again from zero and the cached answers predate the reboot
+        if self.statistics is not None:
+            self.statistics.reset_counters()
+        self.usage.reset_counters()
+        self.router.invalidate()
+        self.hass.bus.async_fire(
+            EVENT_ROUTER_REBOOTED,
+            {
+                "entry_id": self.entry.entry_id,
+                "last_restart": restart.isoformat(),
+                "previous_restart": previous_restart.isoformat(),
+                "uptime": uptime,
+                "previous_uptime": previous,
+            },
+        )
+
+    async def async_probe_unsupported(self) -> None:
+        """Find the oids the router does not support, for entries created without that list.
+
+        Those entries poll every oid meanwhile, the unsupported ones are left to their breakers.
+        """
+        try:
+            unsupported = await self.router.probe_unsupported_endpoints([oid for oid, _ in STATUS_ENDPOINTS])
+        except Exception as ex:
+            # Polling all of them meanwhile, probed again on the next setup
+            _LOGGER.debug("Zyxel endpoint probe of %s failed: %s", self.entry.title, ex)
+            return
+        self.router.unsupported = set(unsupported)
+        self.hass.config_entries.async_update_entry(
+            self.entry, data={**self.entry.data, CONF_UNSUPPORTED: unsupported}
+        )
+        _LOGGER.debug("Zyxel endpoints not supported by %s: %s", self.entry.title, unsupported)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, timed while profiling."""
+        if self.profiler is None:
+            super().async_update_listeners()
+            return
+        with self.profiler.stage("entity_dispatch"):
+            super().async_update_listeners()
+
+    async def async_profile_poll(self, cprofile: bool = False) -> dict:
+        """Run one instrumented refresh and return the time spent per stage."""
+        # A scheduled poll in flight would overlap the refresh and its login, and be profiled too
+        await self.scheduler.async_wait_idle(self)
+        profiler = PollProfiler()
+        self.profiler = self.router.profiler = profiler
+        profile = None
+        if cprofile:
+            # Only needed here, kept out of the import of the integration
+            import cProfile
+
+            profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            if profile:
+                # Everything running in the event loop meanwhile is profiled as well
+                profile.enable()
+            # Started through the scheduler, which skips its ticks until it is done
+            await self.scheduler.async_start_poll(self)
+        finally:
+            if profile:
+                profile.disable()
+            self.profiler = self.router.profiler = None
+
+        result = {
+            "time": dt_util.utcnow().isoformat(),
+            "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            "success": self.last_update_success,
+            "stages": profiler.as_dict(),
+        }
+        if profile:
+            import io
+            import pstats
+
+            stream = io.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(PROFILE_STATS_LINES)
+            result["cprofile"] = stream.getvalue()
+        self.last_profile = result
+        return result
+
+    @callback
+    def _async_notify_expired(self) -> None:
+        """Let entities whose data just went past the staleness window become unavailable."""
+        # Nothing was refreshed by this failed poll
+        self._fresh_groups = set()
+        # The base coordinator only notifies on the first of consecutive failures
+        if not self.last_update_success:
+            self.async_update_listeners()
+
+
+def _timed(func, *args):
+    """Return the result of func and the seconds it took."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _group_of(key: str) -> str:
+    """Return the endpoint group of a flattened key."""
+    return key.split(".", 1)[0]
@@ -0,0 +1,46 @@
+"""Byte counter increments and billing cycles of the data usage, without Home Assistant."""
+from __future__ import annotations
+
+from calendar import monthrange
+from datetime import date, timedelta
+
+# Traffic_Status interface counter -> direction
+USAGE_COUNTERS = {"BytesReceived": "rx", "BytesSent": "tx"}
+
+
+def traffic_counter(key: str) -> tuple[str, str] | None:
+    """Return the interface and direction of a flattened traffic counter key, or None.
+
+    Interface names may hold dots themselves (ptm0.1, eth4.1), only the last one splits.
+    """
+    group, _, name = key.partition(".")
+    if group != "traffic":
+        return None
+    interface, _, counter = name.rpartition(".")
+    direction = USAGE_COUNTERS.get(counter)
+    if direction is None or not interface:
+        return None
+    return interface, direction
+
+
+def counter_increment(previous: int, value: int, restarted: bool) -> int:
+    """Return the bytes counted between two samples of a counter."""
+    if restarted:
+        # Counting again from zero since the reboot
+        return value
+    if value >= previous:
+        return value - previous
+    # A 32 bit counter in the upper half of its range wrapped around (64 bit
+    # counters never do), anything else is a reset the uptime did not show
+    if 2 ** 31 <= previous < 2 ** 32:
+        return value + 2 ** 32 - previous
+    return value
+
+
+def cycle_start(today: date, billing_day: int) -> date:
+    """Return the first day of the billing cycle holding today."""
+    start = today.replace(day=min(billing_day, monthrange(today.year, today.month)[1]))
+    if start > today:
+        last_month = today.replace(day=1) - timedelta(days=1)
+        start = last_month.replace(day=min(billing_day, monthrange(last_month.year, last_month.month)[1]))
+    return start
@@ -4,6 +4,7 @@ from typing import Any
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from .const import *
+from .nr7101 import redact
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: ConfigEntry
@@ -13,8 +14,20 @@ async def async_get_config_entry_diagnostics(
     router = coordinator.router
 
     return {        
-        "coordinator_data": coordinator.data,
-        "raw_data": router.last_status_data
+        "timings": coordinator.timings,
+        "poll_stats": coordinator.poll_stats,
+        "last_profile": coordinator.last_profile,
+        "loop_blocking": router.blocking.as_dict(),
+        "circuit_breakers": {oid: breaker.as_dict() for oid, breaker in router.breakers.items()},
+        "uptime": coordinator.uptime,
+        "last_restart": coordinator.last_restart,
+        "flatten_plan_compiles": coordinator.flattener.compiles,
+        "handovers": list(coordinator.handovers.history)[-50:],
+        "usage": coordinator.usage.periods,
+        "coordinator_data": redact(coordinator.data),
+        "raw_data": redact(router.last_status_data),
+        "raw_history": router.history.as_dict(),
+        "capture": router.capture.as_dict() if router.capture else None,
     }
 
 
@@ -44,10 +44,18 @@ class ZyxelBaseEntity(CoordinatorEntity):
         # Reuse the same DeviceInfo already created
         return self.coordinator.device_info
 
+    @property
+    def extra_state_attributes(self):
+        """Flag values not refreshed by the latest poll."""
+        if self.coordinator.is_stale(self._key):
+            return {"stale": True}
+        return None
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        if not self.coordinator.last_update_success:
+        # Unavailable only once this entity's own data is too old
+        if not self.coordinator.data or self.coordinator.is_expired(self._key):
             return False
 
         # Check if the key exists in the data
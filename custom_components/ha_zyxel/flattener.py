@@ -0,0 +1,89 @@
+"""Flattening of router snapshots through per-group compiled plans."""
+from __future__ import annotations
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ShapeChanged(Exception):
+    """The payload no longer matches the compiled plan."""
+
+
+class SnapshotFlattener:
+    """Flatten nested snapshots into dot notation keys.
+
+    The payload of a router model keeps the same shape from poll to poll, so
+    the first payload of each group is walked once into a plan: a flat list
+    of steps, each looking up one key of an already resolved node. Later
+    polls only replay the steps, and the plan of a group is compiled again
+    when a lookup fails or a container changed type or size.
+
+    Lists are kept as values, except those in expand_lists (flattened keys,
+    e.g. "cellular.SCC_Info") whose items get index keys.
+    """
+
+    def __init__(self, expand_lists=()) -> None:
+        self.expand_lists = set(expand_lists)
+        # group -> (size of the group, steps), a step being
+        # (parent node index, key, container type or None, size or flat key)
+        self.plans: dict[str, tuple[int, list[tuple]]] = {}
+        self.compiles = 0
+
+    def flatten(self, data: dict) -> dict:
+        flat = {}
+        for group, value in data.items():
+            if not isinstance(value, dict):
+                flat[group] = value
+                continue
+            plan = self.plans.get(group)
+            if plan is not None:
+                try:
+                    self._apply(plan, value, flat)
+                    continue
+                except (ShapeChanged, KeyError, IndexError, TypeError):
+                    # Drop the partial output of the stale plan
+                    prefix = f"{group}."
+                    for key in [k for k in flat if k.startswith(prefix)]:
+                        del flat[key]
+                    _LOGGER.debug("Shape of Zyxel %s changed, compiling its plan again", group)
+            plan = self.plans[group] = self._compile(value, group)
+            self.compiles += 1
+            self._apply(plan, value, flat)
+        return flat
+
+    def _compile(self, root: dict, group: str) -> tuple[int, list[tuple]]:
+        steps = []
+        # Nodes are numbered in the order their steps resolve them, the root is 0
+        containers = 0
+
+        def walk(node, index, path):
+            nonlocal containers
+            items = node.items() if isinstance(node, dict) else enumerate(node)
+            for key, value in items:
+                flat_key = f"{path}.{key}"
+                if isinstance(value, dict) or (isinstance(value, list) and flat_key in self.expand_lists):
+                    steps.append((index, key, type(value), len(value)))
+                    containers += 1
+                    walk(value, containers, flat_key)
+                else:
+                    steps.append((index, key, None, flat_key))
+
+        walk(root, 0, group)
+        return len(root), steps
+
+    def _apply(self, plan: tuple[int, list[tuple]], root: dict, flat: dict) -> None:
+        size, steps = plan
+        if len(root) != size:
+            raise ShapeChanged(None)
+        nodes = [root]
+        for parent, key, kind, target in steps:
+            value = nodes[parent][key]
+            if kind is None:
+                if isinstance(value, dict) or (isinstance(value, list) and target in self.expand_lists):
+                    raise ShapeChanged(target)
+                flat[target] = value
+            else:
+                if type(value) is not kind or len(value) != target:
+                    raise ShapeChanged(key)
+                nodes.append(value)
@@ -0,0 +1,90 @@
+"""Serving cell handover history."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import *
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HandoverTracker:
+    """Keep a bounded, persisted ring buffer of serving cell and band changes."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.history: deque[dict] = deque(maxlen=HANDOVER_HISTORY_SIZE)
+        # Serving cell seen by the latest poll
+        self._last: dict | None = None
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.handovers")
+
+    async def async_load(self) -> None:
+        """Restore the history, so handovers across a restart are detected too."""
+        stored = await self._store.async_load()
+        if stored:
+            self.history.extend(stored.get("history", []))
+            self._last = stored.get("last")
+
+    def _data_to_store(self) -> dict:
+        return {"last": self._last, "history": list(self.history)}
+
+    @callback
+    def async_update(self, data: dict) -> None:
+        """Record a handover if the serving cell or band changed since the last poll."""
+        current = {
+            "cell_id": data.get("cellular.INTF_Cell_ID"),
+            "pci": data.get("cellular.INTF_PhyCell_ID"),
+            "band": data.get("cellular.INTF_Current_Band"),
+            "rsrp": data.get("cellular.INTF_RSRP"),
+        }
+        if current["cell_id"] is None and current["pci"] is None:
+            return
+
+        last, self._last = self._last, current
+        if last is None or all(last[k] == current[k] for k in ("cell_id", "pci", "band")):
+            if last is None:
+                self._store.async_delay_save(self._data_to_store, HANDOVER_SAVE_DELAY)
+            return
+
+        handover = {
+            "ts": time.time(),
+            "old_cell_id": last["cell_id"],
+            "new_cell_id": current["cell_id"],
+            "old_pci": last["pci"],
+            "new_pci": current["pci"],
+            "old_band": last["band"],
+            "new_band": current["band"],
+            "rsrp_before": last["rsrp"],
+            "rsrp_after": current["rsrp"],
+        }
+        self.history.append(handover)
+        _LOGGER.debug("Zyxel cell handover: %s", handover)
+
+        self.hass.bus.async_fire(
+            EVENT_CELL_HANDOVER,
+            {
+                "entry_id": self.entry.entry_id,
+                **{k: v for k, v in handover.items() if k != "ts"},
+                "time": dt_util.utc_from_timestamp(handover["ts"]).isoformat(),
+            },
+        )
+        self._store.async_delay_save(self._data_to_store, HANDOVER_SAVE_DELAY)
+
+    def count_since(self, seconds: float) -> int:
+        """Return the number of handovers in the last seconds."""
+        since = time.time() - seconds
+        count = 0
+        # Newest first, stop at the first older entry
+        for handover in reversed(self.history):
+            if handover["ts"] < since:
+                break
+            count += 1
+        return count
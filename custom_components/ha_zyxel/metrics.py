@@ -0,0 +1,137 @@
+"""OpenMetrics exporter for Zyxel routers."""
+from __future__ import annotations
+
+import logging
+
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+
+from .const import *
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Flattened cellular key -> (metric, help)
+SIGNAL_METRICS = {
+    "INTF_RSSI": ("zyxel_rssi_dbm", "Cellular received signal strength indicator"),
+    "INTF_RSRP": ("zyxel_rsrp_dbm", "Cellular reference signal received power"),
+    "INTF_RSRQ": ("zyxel_rsrq_db", "Cellular reference signal received quality"),
+    "INTF_SINR": ("zyxel_sinr_db", "Cellular signal to noise ratio"),
+    "INTF_CQI": ("zyxel_cqi", "Cellular channel quality indicator"),
+    "INTF_MCS": ("zyxel_mcs", "Cellular modulation and coding scheme"),
+    "NSA_RSSI": ("zyxel_nsa_rssi_dbm", "NSA received signal strength indicator"),
+    "NSA_RSRP": ("zyxel_nsa_rsrp_dbm", "NSA reference signal received power"),
+    "NSA_RSRQ": ("zyxel_nsa_rsrq_db", "NSA reference signal received quality"),
+    "NSA_SINR": ("zyxel_nsa_sinr_db", "NSA signal to noise ratio"),
+}
+
+# Traffic_Status interface counter -> (metric, help)
+TRAFFIC_METRICS = {
+    "BytesSent": ("zyxel_interface_sent_bytes", "Bytes sent by the interface"),
+    "BytesReceived": ("zyxel_interface_received_bytes", "Bytes received by the interface"),
+    "PacketsSent": ("zyxel_interface_sent_packets", "Packets sent by the interface"),
+    "PacketsReceived": ("zyxel_interface_received_packets", "Packets received by the interface"),
+}
+
+
+def async_setup_metrics(hass: HomeAssistant) -> None:
+    """Register the metrics view once, the first time an entry enables it."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if domain_data.get("metrics_view"):
+        return
+    hass.http.register_view(ZyxelMetricsView())
+    domain_data["metrics_view"] = True
+
+
+class ZyxelMetricsView(HomeAssistantView):
+    """Serve the latest snapshot of the routers with metrics enabled."""
+
+    url = METRICS_URL
+    name = "api:ha_zyxel:metrics"
+    requires_auth = True
+
+    def __init__(self) -> None:
+        self._body: bytes | None = None
+        self._key: tuple | None = None
+
+    async def get(self, request: web.Request) -> web.Response:
+        hass = request.app[KEY_HASS]
+        coordinators = [
+            entry.runtime_data
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+            and entry.runtime_data
+            and entry.options.get(CONF_METRICS, False)
+        ]
+
+        # The body only changes when one of the coordinators refreshed
+        key = tuple((c.entry.entry_id, c.poll_stats["polls"], c.last_update_success) for c in coordinators)
+        if key != self._key:
+            self._body = _render(coordinators).encode("utf-8")
+            self._key = key
+        return web.Response(body=self._body, headers={"Content-Type": CONTENT_TYPE})
+
+
+def _render(coordinators) -> str:
+    """Render the exposition, samples of all routers grouped per family."""
+    families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(metric, kind, help_text, labels, value, suffix=""):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        family = families.setdefault(metric, (kind, help_text, []))
+        label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        family[2].append(f"{metric}{suffix}{{{label_text}}} {value}")
+
+    for coordinator in coordinators:
+        router = {"router": coordinator.entry.title}
+        data = coordinator.data or {}
+
+        for key, value in data.items():
+            group, _, name = key.partition(".")
+            if group == "cellular" and name in SIGNAL_METRICS:
+                metric, help_text = SIGNAL_METRICS[name]
+                add(metric, "gauge", help_text, router, value)
+            elif group == "traffic":
+                interface, _, counter = name.rpartition(".")
+                if counter in TRAFFIC_METRICS:
+                    metric, help_text = TRAFFIC_METRICS[counter]
+                    add(metric, "counter", help_text, {**router, "interface": interface}, value, "_total")
+
+        add("zyxel_uptime_seconds", "gauge", "Router uptime", router, data.get("device.DeviceInfo.UpTime"))
+
+        stats = coordinator.poll_stats
+        add("zyxel_poll_up", "gauge", "Whether the last poll succeeded", router,
+            int(coordinator.last_update_success))
+        add("zyxel_poll_duration_seconds", "gauge", "Duration of the last poll", router, stats["duration"])
+        add("zyxel_polls", "counter", "Polls attempted", router, stats["polls"], "_total")
+        add("zyxel_poll_failures", "counter", "Polls that failed", router, stats["failures"], "_total")
+        add("zyxel_last_success_timestamp_seconds", "gauge", "Time of the last successful poll", router,
+            stats["last_success"])
+        for stage, blocking in coordinator.router.blocking.as_dict().items():
+            labels = {**router, "stage": stage}
+            add("zyxel_loop_blocking_seconds", "counter", "Time CPU-bound stages ran on the event loop", labels,
+                blocking["blocking_ms"] / 1000, "_total")
+            add("zyxel_offloaded", "counter", "Runs of CPU-bound stages moved to an executor", labels,
+                blocking["offloaded"], "_total")
+        for oid, breaker in coordinator.router.breakers.items():
+            add("zyxel_endpoint_circuit_open", "gauge", "Whether polling of the endpoint is suspended",
+                {**router, "endpoint": oid}, int(breaker.state != breaker.CLOSED))
+
+    lines = []
+    for metric, (kind, help_text, samples) in families.items():
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.extend(samples)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
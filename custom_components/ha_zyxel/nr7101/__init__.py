@@ -1,3 +1,10 @@
 from .nr7101 import NR7101, NR7101Exception
+from .breaker import CircuitBreaker
+from .profiler import BlockingMeter, PollProfiler
+from .history import PayloadHistory
+from .redact import redact
+from .capture import CaptureRecorder, load_archive
+from .replay import ReplayServer
 
-__all__ = ['NR7101', 'NR7101Exception']
\ No newline at end of file
+__all__ = ['NR7101', 'NR7101Exception', 'CircuitBreaker', 'PollProfiler', 'BlockingMeter', 'PayloadHistory',
+           'redact', 'CaptureRecorder', 'load_archive', 'ReplayServer']
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Run as python -m nr7101 from the integration directory, that directory comes
+# first on sys.path and its modules (statistics.py, const.py, ...) would shadow
+# the stdlib and other packages. The package itself is imported already.
+_integration = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != _integration]
+
+from .cli import main
+
+sys.exit(main())
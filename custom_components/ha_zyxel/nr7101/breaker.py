@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Circuit breaker of a single oid.
+
+    closed: the oid is polled normally. After failure_threshold consecutive
+    failures it goes open and is skipped for a backoff that doubles on every
+    trip, up to max_backoff. Once the backoff is over it goes half_open: the
+    next poll is a trial, success closes the breaker and failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=3, base_backoff=30, max_backoff=1800, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+        self.last_error = None
+
+    def allow(self):
+        """Return whether the oid may be requested now."""
+        if self.state == self.OPEN:
+            if self.clock() < self.retry_at:
+                return False
+            self.state = self.HALF_OPEN
+            logger.debug(f"Circuit {self.name} half open, trying again")
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.debug(f"Circuit {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+
+    def record_failure(self, error=None):
+        self.failures += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trips += 1
+            backoff = min(self.base_backoff * 2 ** (self.trips - 1), self.max_backoff)
+            self.retry_at = self.clock() + backoff
+            self.state = self.OPEN
+            logger.debug(f"Circuit {self.name} open for {backoff}s after {self.failures} failures: {error}")
+
+    def as_dict(self):
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(self.retry_at - self.clock(), 0), 1)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": retry_in,
+            "last_error": self.last_error,
+        }
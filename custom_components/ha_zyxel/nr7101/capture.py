@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Fixture archives of the object requests of a router.
+
+An archive is a gzip compressed JSON document:
+
+    {"version": 1, "captured_at": ..., "meta": {...}, "records": [
+        {"oid": "cellwan_status", "time": 0.12, "elapsed_ms": 84.2, "status": 200,
+         "size": 2345, "error": null, "response": {"result": "ZCFG_SUCCESS", "Object": [...]}},
+    ]}
+
+Responses are stored decrypted and redacted. The diagnostics of the Home
+Assistant integration embed the same document under data.capture.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from .redact import redact
+
+ARCHIVE_VERSION = 1
+
+
+class CaptureRecorder:
+    """Record the object requests of a client, keeping the last max_records.
+
+    Large answers are recorded from executor threads, hence the lock.
+    """
+
+    def __init__(self, max_records=500, clock=time.time):
+        self.clock = clock
+        self.started = clock()
+        self.records = deque(maxlen=max_records)
+        self.meta = {}
+        self._lock = threading.Lock()
+
+    def record(self, oid, elapsed, status, size=None, response=None, error=None):
+        if response is not None:
+            response = redact(response, "sms" in oid.lower())
+        with self._lock:
+            if response is not None and oid == "status":
+                self._describe(response)
+            self.records.append({
+                "oid": oid,
+                "time": round(self.clock() - self.started, 3),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "status": status,
+                "size": size,
+                "error": error,
+                "response": response,
+            })
+
+    def _describe(self, response):
+        # Model and firmware, to tell the archives of the corpus apart
+        try:
+            info = response["Object"][0]["DeviceInfo"]
+        except (KeyError, IndexError, TypeError):
+            return
+        for key, name in (("ModelName", "model"), ("SoftwareVersion", "firmware")):
+            if info.get(key):
+                self.meta[name] = info[key]
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "version": ARCHIVE_VERSION,
+                "captured_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                "meta": dict(self.meta),
+                "records": list(self.records),
+            }
+
+    def save(self, path):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, separators=(",", ":"))
+
+
+def load_archive(path):
+    """Load an archive, or the capture embedded in a diagnostics download."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    archive = json.loads(raw)
+    if "records" not in archive:
+        archive = (archive.get("data") or {}).get("capture") or {}
+    if archive.get("version") != ARCHIVE_VERSION or not archive.get("records"):
+        raise ValueError(f"{path} is not a capture archive, or it holds no records")
+    return archive
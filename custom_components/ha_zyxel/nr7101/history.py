@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+
+from .redact import redact
+
+
+class PayloadHistory:
+    """Bounded history of the raw payloads of each oid.
+
+    Payloads are redacted and stored zlib compressed, a payload equal to the
+    previous one of its oid only bumps that entry's repeat count. Each oid
+    keeps at most size entries, and once the compressed payloads of all oids
+    take more than max_bytes the oldest entries are dropped.
+
+    Given the digest of the raw answer, an unchanged payload is detected before
+    it is redacted and compressed. Recording is thread safe, large payloads are
+    recorded from an executor.
+    """
+
+    def __init__(self, size=20, max_bytes=256 * 1024, clock=time.time):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.clock = clock
+        # oid -> deque of [first time, last time, repeats, compressed payload, error, digest]
+        self._entries = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, oid, payload=None, error=None, digest=None):
+        """Record the payload of oid, or the error it failed with."""
+        if digest is not None and self._repeat(oid, error, lambda entry: entry[5] == digest):
+            return
+
+        blob = None
+        if payload is not None:
+            text = json.dumps(redact(payload, "sms" in oid.lower()), sort_keys=True, separators=(",", ":"))
+            blob = zlib.compress(text.encode("utf-8"))
+        if self._repeat(oid, error, lambda entry: entry[3] == blob, digest):
+            return
+
+        with self._lock:
+            now = self.clock()
+            entries = self._entries.setdefault(oid, deque())
+            entries.append([now, now, 1, blob, error, digest])
+            self.bytes += len(blob or b"")
+            self._evict(entries)
+
+    def _repeat(self, oid, error, same, digest=None):
+        """Count a repeat of the latest entry of oid if it is the same, return whether it was."""
+        with self._lock:
+            entries = self._entries.get(oid)
+            if not entries or entries[-1][4] != error or not same(entries[-1]):
+                return False
+            entries[-1][1] = self.clock()
+            entries[-1][2] += 1
+            if digest is not None:
+                entries[-1][5] = digest
+            return True
+
+    def _evict(self, entries):
+        if len(entries) > self.size:
+            self._drop(entries)
+        while self.bytes > self.max_bytes:
+            # Oldest entry of all oids, a single payload larger than the cap goes too
+            oldest = min((e for e in self._entries.values() if e), key=lambda e: e[0][0])
+            self._drop(oldest)
+
+    def _drop(self, entries):
+        self.bytes -= len(entries.popleft()[3] or b"")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def as_dict(self):
+        """Return the decompressed history, oldest entry first."""
+        with self._lock:
+            snapshot = {oid: list(entries) for oid, entries in self._entries.items()}
+        return {
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "endpoints": {
+                oid: [
+                    {
+                        "first_seen": _isoformat(first),
+                        "last_seen": _isoformat(last),
+                        "repeats": repeats,
+                        "payload": json.loads(zlib.decompress(blob)) if blob else None,
+                        "error": error,
+                    }
+                    for first, last, repeats, blob, error, _ in entries
+                ]
+                for oid, entries in snapshot.items()
+            },
+        }
+
+
+def _isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
@@ -3,21 +3,52 @@
 import logging
 import json
 import base64
+import hashlib
 import os
-from Crypto.Cipher import AES, PKCS1_v1_5
-from Crypto.Util.Padding import pad, unpad
-from Crypto.PublicKey import RSA
+import time
+from contextlib import nullcontext
 
-import ssl
 import aiohttp
 import asyncio
 from aiohttp import ClientResponseError
 
-import requests
-import urllib3
+from .breaker import CircuitBreaker
+from .capture import CaptureRecorder
+from .history import PayloadHistory
+from .profiler import BlockingMeter
 
 logger = logging.getLogger(__name__)
 
+# pycryptodome is only needed by routers that publish an RSA key, so it is
+# imported on first use instead of at module import time.
+_crypto = None
+
+
+def _load_crypto():
+    """Import the pycryptodome primitives once and cache them."""
+    global _crypto
+    if _crypto is None:
+        from Crypto.Cipher import AES, PKCS1_v1_5
+        from Crypto.Util.Padding import pad, unpad
+        from Crypto.PublicKey import RSA
+
+        _crypto = (AES, PKCS1_v1_5, pad, unpad, RSA)
+    return _crypto
+
+
+# Endpoints polled by get_status, with the key they are stored under
+STATUS_ENDPOINTS = [
+    ("cellwan_status", "cellular"),
+    ("Traffic_Status", "traffic"),
+    ("cardpage_status", "cardpage"),
+    ("lan", "lan"),
+    ("lanhosts", "lanhosts"),
+    ("wifi_easy_mesh", "wifi_mesh"),
+    ("one_connect", "one_connect"),
+    ("cellwan_sms", "sms"),
+    ("status", "device"),
+]
+
 
 class NR7101Exception(Exception):
     def __init__(self, error):
@@ -25,12 +56,40 @@ class NR7101Exception(Exception):
 
 
 class NR7101:
-    def __init__(self, url, username, password, params={}):
+    def __init__(self, url, username, password, params={}, endpoints=None, unsupported=None, encryption_required=None,
+                 timeout=10, max_concurrent=1, retries=2, limiter=None,
+                 history_size=20, history_max_bytes=256 * 1024, offload_threshold=16 * 1024):
         self.url = url
         self.params = params
         self.rsa_key = None
-        self.encryption_required = False
+        # None means unknown, detected through /getRSAPublickKey on login
+        self.encryption_known = encryption_required is not None
+        self.encryption_required = bool(encryption_required)
         self.last_status_data = None
+        # oids to poll, None polls all STATUS_ENDPOINTS but the ones the router does not support
+        self.endpoints = endpoints
+        self.unsupported = set(unsupported or ())
+        # Per-oid circuit breakers, a failing oid is skipped without affecting the others
+        self.breakers = {}
+        # Server errors on this many oids in the same poll reset the session
+        self.session_reset_threshold = 3
+        # Answers of get_json_object per oid, as (loop time, object), reused for
+        # cache_ttl seconds (per oid overrides in cache_ttls), and the requests in flight
+        self.cache_ttl = 5
+        self.cache_ttls = {}
+        self._cache = {}
+        self._cache_generation = 0
+        self._inflight = {}
+        # Redacted, compressed recent payloads and errors of each oid
+        self.history = PayloadHistory(history_size, history_max_bytes)
+        # PollProfiler timing the stages of requests while set
+        self.profiler = None
+        # CaptureRecorder recording the object requests while set
+        self.capture = None
+        # Answers of at least this many bytes are decrypted and parsed in an
+        # executor thread instead of on the event loop, 0 never offloads
+        self.offload_threshold = offload_threshold
+        self.blocking = BlockingMeter()
 
         
         self.sessionkey = None
@@ -41,25 +100,68 @@ class NR7101:
         self.aes_key = None
         self.iv = None
 
+        self._login_lock = asyncio.Lock()
+        # Optional semaphore shared with other clients, bounding their requests together
+        self.limiter = limiter
+        self.configure(timeout=timeout, max_concurrent=max_concurrent, retries=retries)
+
         self.cookiejar = aiohttp.CookieJar(unsafe=True)  # accetta self-signed cert
         self.session = aiohttp.ClientSession(cookie_jar=self.cookiejar, connector=aiohttp.TCPConnector(ssl=False))
 
+    def configure(self, timeout=None, max_concurrent=None, retries=None):
+        """Change the request limits, also while polling."""
+        if timeout is not None:
+            # Deadline of each single request, in seconds
+            self.timeout = aiohttp.ClientTimeout(total=timeout)
+        if max_concurrent is not None:
+            # Requests already in flight keep the semaphore they acquired
+            self.max_concurrent = max_concurrent
+            self._request_slots = asyncio.Semaphore(max_concurrent)
+        if retries is not None:
+            self.retries = retries
+
     async def close(self):
         await self.session.close()
 
-    async def _get(self, path, headers=None, params=None, asText=False):
+    def start_capture(self, max_records=500):
+        """Record the object requests into a fixture archive, see capture.py."""
+        self.capture = CaptureRecorder(max_records)
+        self.capture.meta["encryption_required"] = self.encryption_required
+        return self.capture
+
+    def stop_capture(self):
+        """Stop recording, return the recorder."""
+        capture, self.capture = self.capture, None
+        return capture
+
+    def _stage(self, name):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _get(self, path, headers=None, params=None, asText=False, asBytes=False):
         url = self.url + path
-        async with self.session.get(url, headers=headers, **(params or {})) as r:
-            r.raise_for_status()
-            if asText:
-                return await r.text()
-            return await r.json()
+        async with self._request_slots, self.limiter or nullcontext():
+            async with self.session.get(url, headers=headers, timeout=self.timeout, **(params or {})) as r:
+                r.raise_for_status()
+                if asText:
+                    return await r.text()
+                if asBytes:
+                    return await r.read()
+                return await r.json()
 
     async def _post(self, path, data=None, headers=None, params=None):
         url = self.url + path
-        async with self.session.post(url, data=data, headers=headers, **(params or {})) as r:
-            r.raise_for_status()
-            return await r.json()
+        async with self._request_slots, self.limiter or nullcontext():
+            async with self.session.post(url, data=data, headers=headers, timeout=self.timeout, **(params or {})) as r:
+                r.raise_for_status()
+                return await r.json()
 
 
     async def initialize(self):
@@ -88,23 +190,38 @@ class NR7101:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:142.0) Gecko/20100101 Firefox/142.0'
         }
 
-        try:
-            r = await self._get("/getRSAPublickKey", headers=rsa_headers)
-            self.rsa_key = r.get("RSAPublicKey", None)
-            if self.rsa_key == "None":
+        if self.encryption_known and not self.encryption_required:
+            # Plain-text router cached from a previous detection, skip the key request
+            logger.debug("getRSAPublickKey skipped, encryption not required")
+        else:
+            try:
+                r = await self._get("/getRSAPublickKey", headers=rsa_headers)
+                self.rsa_key = r.get("RSAPublicKey", None)
+                if self.rsa_key == "None":
+                    self.rsa_key = None
+                self.encryption_required = bool(self.rsa_key)
+                self.encryption_known = True
+                if self.encryption_required and _crypto is None:
+                    # Import off the event loop, the first import reads from disk
+                    await asyncio.get_running_loop().run_in_executor(None, _load_crypto)
+                logger.debug(f"getRSAPublickKey, rsa_key: {self.rsa_key}, encryption_required: {self.encryption_required}")
+            except Exception as e:
+                logger.debug(f"Error getRSAPublickKey, error: {e}")
                 self.rsa_key = None
-            self.encryption_required = bool(self.rsa_key)
-            logger.debug(f"getRSAPublickKey, rsa_key: {self.rsa_key}, encryption_required: {self.encryption_required}")
-        except Exception as e:
-            logger.debug(f"Error getRSAPublickKey, error: {e}")
-            self.rsa_key = None
-            self.encryption_required = False
+                self.encryption_required = False
 
         self.aes_key = os.urandom(32)  # 256-bit AES key
         self.iv = os.urandom(32)       # 32-byte IV to match browser behavior
 
 
+    async def probe(self):
+        """Lightweight reachability check, returns whether encryption is required."""
+        self.encryption_known = False
+        await self.initialize()
+        return self.encryption_required
+
     async def login(self):
+        rsa_skipped = self.encryption_known and not self.encryption_required
         await self.initialize()
 
         # Login parameters
@@ -140,11 +257,22 @@ class NR7101:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:142.0) Gecko/20100101 Firefox/142.0'
         }
 
-        r = await self._post("/UserLogin", data=login_json.encode("utf-8"), headers=headers)
+        try:
+            r = await self._post("/UserLogin", data=login_json.encode("utf-8"), headers=headers)
+        except ClientResponseError:
+            if not rsa_skipped:
+                raise
+            r = {}
         if self.encryption_required:
             response_data = self.decrypt_response(r)
         else:
             response_data = r
+
+        if rsa_skipped and "sessionkey" not in response_data:
+            # The cached encryption mode may be outdated (firmware update), detect it again
+            logger.debug("login failed with cached encryption mode, detecting it again")
+            self.encryption_known = False
+            return await self.login()
         
         logger.debug(f"login info: response_data: {response_data}")
 
@@ -165,64 +293,106 @@ class NR7101:
         # Check login
         #await self._get("/UserLoginCheck")
 
-    async def get_status(self, retries=2):
-
-        # Define endpoint priorities based on router type
-        endpoints_to_try = [
-            ("cellwan_status", "cellular"),
-            ("Traffic_Status", "traffic"),
-            ("cardpage_status", "cardpage"),
-            ("lan", "lan"),
-            ("lanhosts", "lanhosts"),
-            ("wifi_easy_mesh", "wifi_mesh"),
-            ("one_connect", "one_connect"),
-            ("cellwan_sms", "sms"),
-            ("status", "device"),
-        ]
+    async def get_status(self, retries=None, deadline=None):
+        """Poll the status endpoints, returning whatever answered.
+
+        Each endpoint is bounded by the per-request timeout; deadline (seconds)
+        bounds the whole poll, endpoints still pending then are left out.
+        """
+        if retries is None:
+            retries = self.retries
+        loop = asyncio.get_running_loop()
+        ends_at = loop.time() + deadline if deadline else None
 
+        endpoints = [e for e in STATUS_ENDPOINTS if e[0] not in self.unsupported]
+        if self.endpoints:
+            endpoints = [e for e in endpoints if e[0] in self.endpoints]
+
+        result = {}
         while retries > 0:
+            retries -= 1
+            endpoints_to_try = [e for e in endpoints if self.breaker(e[0]).allow()]
+            if not endpoints_to_try:
+                return None
+            # Endpoints are requested together, max_concurrent limits how many hit the router at once
+            tasks = {
+                asyncio.create_task(self._get_status_object(endpoint)): (endpoint, key)
+                for endpoint, key in endpoints_to_try
+            }
             try:
-                result = {}
-                successful_endpoints = 0
-
-                for endpoint, key in endpoints_to_try:
-                    try:
-                        data = await self.get_json_object(endpoint)
-                        if data:
-                            # Special handling for traffic data
-                            if endpoint == "Traffic_Status":
-                                data = parse_traffic_object(data)
-                            result[key] = data
-                            successful_endpoints += 1
-                    except ClientResponseError as e:
-                        logger.debug(f"Error get_status, url: {endpoint} , error: {e}")
-                        if e.status == 401:
-                            # Re-raise 401 to trigger login retry
-                            raise
-                    except Exception as e:
-                        logger.debug(f"Error get_status, url: {endpoint} , error: {e}")
+                timeout = None if ends_at is None else max(ends_at - loop.time(), 0)
+                done, pending = await asyncio.wait(tasks, timeout=timeout)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            result = {}
+            unauthorized = False
+            server_errors = 0
+            for task, (endpoint, key) in tasks.items():
+                breaker = self.breaker(endpoint)
+                if task in pending:
+                    logger.debug(f"Error get_status, url: {endpoint} , error: poll deadline exceeded")
+                    breaker.record_failure("poll deadline exceeded")
+                    self.history.record(endpoint, error="poll deadline exceeded")
+                    continue
+                if (e := task.exception()) is not None:
+                    logger.debug(f"Error get_status, url: {endpoint} , error: {e}")
+                    if isinstance(e, ClientResponseError) and e.status == 401:
+                        # Session expired, not a failure of the oid
+                        unauthorized = True
                         continue
-
-                if successful_endpoints > 0:
-                    return result
-
-            except ClientResponseError as e:
-                logger.debug(f"Error get_status, error: {e}")
-                if e.status == 401:
-                    # Unauthorized - attempt login
-                    login_success = await self.login()
-                    if not login_success:
-                        break
-                elif e.status == 500:
-                    # Internal server error - retry without cookies
-                    await self.clear_cookies()
-                    await self.login()
-                retries -= 1
-        return None
-
-    async def probe_available_endpoints(self):
+                    if isinstance(e, ClientResponseError):
+                        server_errors += e.status == 500
+                        # The url carries the sessionkey, keep it out of the breaker and history
+                        error = f"HTTP {e.status}"
+                    else:
+                        error = type(e).__name__
+                    breaker.record_failure(error)
+                    self.history.record(endpoint, error=error)
+                else:
+                    breaker.record_success()
+                    if data := task.result():
+                        result[key] = data
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            # A 500 on a single oid is that oid's problem (its breaker handles it), several
+            # together usually mean the session went bad on the router side. Polling only
+            # one or two oids, a single failing one must not reset the session either
+            session_broken = server_errors >= max(2, min(self.session_reset_threshold, len(tasks)))
+            if session_broken:
+                logger.debug(f"get_status: {server_errors} oids failed with 500, resetting the session")
+
+            if ends_at is not None and loop.time() >= ends_at:
+                return result or None
+            if unauthorized or session_broken:
+                # Login again, and poll again unless this poll is usable as is
+                await self._relogin(self.sessionkey)
+                if unauthorized or not result:
+                    continue
+            if result:
+                return result
+        return result or None
+
+    def breaker(self, oid):
+        """Return the circuit breaker of oid."""
+        if oid not in self.breakers:
+            self.breakers[oid] = CircuitBreaker(oid)
+        return self.breakers[oid]
+
+    async def _get_status_object(self, endpoint):
+        # Polls always ask the router, their answer refreshes the cache for other callers
+        data = await self.get_json_object(endpoint, max_age=0)
+        # Special handling for traffic data
+        if data and endpoint == "Traffic_Status":
+            with self._stage("parse_traffic_object"):
+                data = parse_traffic_object(data)
+        return data
+
+    async def probe_available_endpoints(self, endpoints_to_probe=None):
         """Probe which endpoints are available on this router for debugging."""
-        endpoints_to_probe = [
+        endpoints_to_probe = endpoints_to_probe or [
             "cellwan_status",
             "cellwan_sms",
             "Traffic_Status",
@@ -248,50 +418,177 @@ class NR7101:
 
         return available_endpoints
 
+    async def probe_unsupported_endpoints(self, endpoints_to_probe):
+        """Return the endpoints this router does not support.
+
+        Only a 404 or an answer other than ZCFG_SUCCESS counts, an empty object
+        (no SMS yet) or a failing request (timeout, 500) may well answer later.
+        """
+        if not self.sessionkey:
+            # A failing login must not pass for endpoints answering 404
+            await self._relogin(None)
+        unsupported = []
+        for endpoint in endpoints_to_probe:
+            try:
+                j, _ = self._decode(await self._request_object(endpoint))
+            except ClientResponseError as e:
+                if e.status == 404:
+                    unsupported.append(endpoint)
+                continue
+            except Exception as e:
+                logger.debug(f"probe_unsupported_endpoints, url: {endpoint} , error: {e}")
+                continue
+            if j.get("result") != "ZCFG_SUCCESS":
+                unsupported.append(endpoint)
+        return unsupported
+
     async def clear_cookies(self):
         """Cancella i cookie dalla sessione e dal dizionario interno."""
         if self.session and hasattr(self.session, "cookie_jar"):
             self.session.cookie_jar.clear()
             
-    async def get_json_object(self, oid):
-        if not self.sessionkey:
+    async def _relogin(self, failed_sessionkey):
+        """Login again, unless a concurrent request already did after failed_sessionkey."""
+        async with self._login_lock:
+            if self.sessionkey != failed_sessionkey:
+                return
+            if failed_sessionkey:
+                await self.clear_cookies()
             await self.login()
 
-        path = f"/cgi-bin/DAL?oid={oid}"
-        if self.sessionkey:
-            path += f"&sessionkey={self.sessionkey}"
+    async def get_json_object(self, oid, max_age=None):
+        """Return the object of oid.
+
+        Concurrent calls for the same oid share a single request, and answers
+        younger than max_age seconds (default: the oid's cache ttl) are reused.
+        """
+        if max_age is None:
+            max_age = self.cache_ttls.get(oid, self.cache_ttl)
+        cached = self._cache.get(oid)
+        if cached and max_age and asyncio.get_running_loop().time() - cached[0] < max_age:
+            return cached[1]
+
+        task = self._inflight.get(oid)
+        if task is None:
+            task = asyncio.create_task(self._fetch_json_object(oid, self._cache_generation))
+            self._inflight[oid] = task
+            task.add_done_callback(lambda t: self._inflight_done(oid, t))
+        # A caller giving up (deadline) must not cancel the request the others wait for
+        return await asyncio.shield(task)
+
+    def _inflight_done(self, oid, task):
+        if self._inflight.get(oid) is task:
+            del self._inflight[oid]
+        if not task.cancelled():
+            # Mark the exception as retrieved, all the waiters may have given up
+            task.exception()
+
+    def invalidate(self, oid=None):
+        """Drop the cached answer of oid, or of every oid."""
+        if oid is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(oid, None)
+        # Requests already in flight must not store their answer back
+        self._cache_generation += 1
 
+    async def _fetch_json_object(self, oid, generation):
+        started = time.perf_counter()
         try:
-            r = await self._get(path)
-        except ClientResponseError as e:
-            logger.debug(f"Error get_json_object, url: {path} , error: {e}")
-            if e.status in (401, 500):
-                await self.clear_cookies()
-                await self.initialize()
-                await self.login()
-                path = f"/cgi-bin/DAL?oid={oid}"
-                if self.sessionkey:
-                    path += f"&sessionkey={self.sessionkey}"
-                r = await self._get(path)
-            else:
-                raise
-        
-        if self.encryption_required:
-            j = self.decrypt_response(r)
+            r = await self._request_object(oid)
+        except Exception as e:
+            if self.capture is not None:
+                self.capture.record(oid, time.perf_counter() - started, getattr(e, "status", None),
+                                    error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        size = len(r)
+
+        if self.offload_threshold and size >= self.offload_threshold:
+            # Large answers (lanhosts, sms) would block the loop for tens of ms on ARM
+            with self._stage("offload"):
+                j = await asyncio.get_running_loop().run_in_executor(None, self._process, oid, r, elapsed, True)
         else:
-            j = r
+            j = self._process(oid, r, elapsed, False)
 
         if j.get("result") != "ZCFG_SUCCESS" or not j.get("Object"):
             return None
-        return j["Object"][0]
+        obj = j["Object"][0]
+        if generation == self._cache_generation:
+            self._cache[oid] = (asyncio.get_running_loop().time(), obj)
+        return obj
+
+    def _process(self, oid, raw, elapsed, offloaded):
+        """Decode the raw answer of oid and record it, on the loop or in an executor.
+
+        Each CPU-bound step is accounted in self.blocking, as loop time unless offloaded.
+        """
+        timer = time.perf_counter
+        started = timer()
+        j, text = self._decode(raw)
+        decoded = timer()
+        self.blocking.add("decode", decoded - started, offloaded)
+
+        if j.get("result") != "ZCFG_SUCCESS" or not j.get("Object"):
+            self.history.record(oid, error=j.get("result") or "empty answer")
+        else:
+            # The digest of the plain text skips redacting and compressing an unchanged answer
+            digest = hashlib.blake2b(text, digest_size=16).digest()
+            self.history.record(oid, j["Object"][0], digest=digest)
+        recorded = timer()
+        self.blocking.add("history", recorded - decoded, offloaded)
+
+        if self.capture is not None:
+            self.capture.record(oid, elapsed, 200, len(raw), j)
+            self.blocking.add("capture", timer() - recorded, offloaded)
+        return j
+
+    def _decode(self, raw):
+        """Parse (and decrypt) the raw answer of an object request, return it with its plain text."""
+        with self._stage("json_parse"):
+            r = json.loads(raw)
+        if not self.encryption_required:
+            return r, raw
+        with self._stage("decrypt"):
+            decrypted_data = self._decrypt(r)
+        return self._parse_decrypted(decrypted_data), decrypted_data
+
+    async def _request_object(self, oid):
+        if not self.sessionkey:
+            await self._relogin(None)
+
+        sessionkey = self.sessionkey
+        path = f"/cgi-bin/DAL?oid={oid}"
+        if sessionkey:
+            path += f"&sessionkey={sessionkey}"
+
+        try:
+            with self._stage(f"network:{oid}"):
+                return await self._get(path, asBytes=True)
+        except ClientResponseError as e:
+            logger.debug(f"Error get_json_object, url: {path} , error: {e}")
+            # 500 is left to the caller, a failing oid must not reset the session of the others
+            if e.status != 401:
+                raise
+        await self._relogin(sessionkey)
+        path = f"/cgi-bin/DAL?oid={oid}"
+        if self.sessionkey:
+            path += f"&sessionkey={self.sessionkey}"
+        with self._stage(f"network:{oid}"):
+            return await self._get(path, asBytes=True)
 
     async def reboot(self):
         if self.sessionkey is None:
             await self.login()
-        j = await self._post(f"/cgi-bin/Reboot?sessionkey={self.sessionkey}")
+        try:
+            j = await self._post(f"/cgi-bin/Reboot?sessionkey={self.sessionkey}")
+        finally:
+            self.invalidate()
         assert j["result"] == "ZCFG_SUCCESS"
 
     def encrypt_request(self, json_data: dict) -> str:
+        AES, PKCS1_v1_5, pad, _, RSA = _load_crypto()
+
         # Use compact JSON formatting to match browser behavior
         json_body = json.dumps(json_data, separators=(',', ':')).encode('utf-8')
         padded = pad(json_body, 16)
@@ -326,6 +623,23 @@ class NR7101:
             raise
 
     def decrypt_response(self, encrypted_json: dict) -> dict:
+        with self._stage("decrypt"):
+            decrypted_data = self._decrypt(encrypted_json)
+        return self._parse_decrypted(decrypted_data)
+
+    def _parse_decrypted(self, decrypted_data: bytes) -> dict:
+        # Decode and parse as JSON
+        try:
+            with self._stage("json_parse"):
+                json_string = decrypted_data.decode("utf-8")
+                return json.loads(json_string)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            logger.error(f"Error processing JSON response: {e}")
+            raise Exception(f"Failed to process decrypted response: {e}")
+
+    def _decrypt(self, encrypted_json: dict) -> bytes:
+        AES, _, _, unpad, _ = _load_crypto()
+
         # Decode base64 values
         response_iv = base64.b64decode(encrypted_json["iv"])
         ciphertext = base64.b64decode(encrypted_json["content"])
@@ -355,14 +669,7 @@ class NR7101:
             except Exception:
                 # Last resort: use raw decrypted data
                 decrypted_data = decrypted_padded
-
-        # Decode and parse as JSON
-        try:
-            json_string = decrypted_data.decode("utf-8")
-            return json.loads(json_string)
-        except (UnicodeDecodeError, json.JSONDecodeError) as e:
-            logger.error(f"Error processing JSON response: {e}")
-            raise Exception(f"Failed to process decrypted response: {e}")
+        return decrypted_data
 
 
 def parse_traffic_object(obj):
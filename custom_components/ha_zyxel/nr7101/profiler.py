@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PollProfiler:
+    """Accumulate the time spent in each stage of a poll.
+
+    Stages wrapping an await measure wall time, so they include the time
+    spent waiting for the router or for other tasks.
+    """
+
+    def __init__(self):
+        # stage -> [count, total seconds, max seconds]
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += seconds
+        stage[2] = max(stage[2], seconds)
+
+    def as_dict(self):
+        return {
+            name: {"count": count, "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+            for name, (count, total, peak) in sorted(self.stages.items(), key=lambda s: -s[1][1])
+        }
+
+
+class BlockingMeter:
+    """Account the time CPU-bound stages run on the event loop, and how often they were offloaded.
+
+    Offloaded stages report from executor threads, hence the lock.
+    """
+
+    def __init__(self):
+        # stage -> [inline count, offloaded count, inline total seconds, inline max seconds]
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, offloaded=False):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0, 0.0, 0.0])
+            if offloaded:
+                stage[1] += 1
+                return
+            stage[0] += 1
+            stage[2] += seconds
+            stage[3] = max(stage[3], seconds)
+
+    def as_dict(self):
+        with self._lock:
+            stages = {name: list(stage) for name, stage in self.stages.items()}
+        return {
+            name: {
+                "inline": inline,
+                "offloaded": offloaded,
+                "blocking_ms": round(total * 1000, 3),
+                "max_blocking_ms": round(peak * 1000, 3),
+            }
+            for name, (inline, offloaded, total, peak) in stages.items()
+        }
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import re
+
+REDACTED = "**REDACTED**"
+
+# Key fragments (lowercase) whose values are never kept
+SENSITIVE_KEYS = (
+    "password",
+    "passphrase",
+    "psk",
+    "sessionkey",
+    "imei",
+    "imsi",
+    "iccid",
+    "msisdn",
+    "phone",
+    "mac",
+    "serialnumber",
+    "ssid",
+    "hostname",
+)
+
+# Key fragments (lowercase) whose values are never kept inside the SMS objects
+# (a key holding "sms", like the cellwan_sms list), senders and message texts
+SMS_KEYS = ("from", "sender", "number", "content", "body", "message", "text")
+
+# Values that are sensitive whatever their key
+MAC_RE = re.compile(r"\b[0-9a-f]{2}(?:[:-][0-9a-f]{2}){5}\b", re.IGNORECASE)
+PHONE_RE = re.compile(r"\+\d(?:[ -]?\d){5,14}\b")
+# 00 and national (leading 0) numbers only inside the SMS objects, elsewhere
+# they are told from ids and counters by their key
+SMS_PHONE_RE = re.compile(r"\b0\d(?:[ -]?\d){5,14}\b")
+
+
+def redact(obj, sms=False):
+    """Return a copy of obj with credentials, MACs, IMEIs, phone numbers and SMS texts masked."""
+    if isinstance(obj, dict):
+        return {
+            k: REDACTED if _is_sensitive(k, sms) and v not in (None, "") else redact(v, sms or _is_sms(k))
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [redact(v, sms) for v in obj]
+    if isinstance(obj, str):
+        obj = PHONE_RE.sub(REDACTED, MAC_RE.sub(REDACTED, obj))
+        return SMS_PHONE_RE.sub(REDACTED, obj) if sms else obj
+    return obj
+
+
+def _is_sensitive(key, sms=False):
+    key = str(key).lower()
+    fragments = SENSITIVE_KEYS + SMS_KEYS if sms or "sms" in key else SENSITIVE_KEYS
+    return any(fragment in key for fragment in fragments)
+
+
+def _is_sms(key):
+    return "sms" in str(key).lower()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+from collections import defaultdict
+from itertools import cycle
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayServer:
+    """Serve a capture archive like a plain-text router.
+
+    Each oid answers its recorded responses (or error statuses) in order,
+    starting over once they are all used. speed scales the recorded response
+    times: 0 answers at once, 1 waits as long as the router did.
+    """
+
+    def __init__(self, archive, speed=0.0):
+        self.archive = archive
+        self.speed = speed
+        records = defaultdict(list)
+        for record in archive["records"]:
+            records[record["oid"]].append(record)
+        self._records = {oid: cycle(r) for oid, r in records.items()}
+        self.requests = 0
+        self._runner = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/GetInfoNoLogin", self._info)
+        app.router.add_get("/getRSAPublickKey", self._rsa_key)
+        app.router.add_post("/UserLogin", self._login)
+        app.router.add_get("/cgi-bin/UserLogout", self._success)
+        app.router.add_post("/cgi-bin/Reboot", self._success)
+        app.router.add_get("/cgi-bin/DAL", self._object)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving, return the url of the server."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _info(self, request):
+        return web.json_response({"result": "ZCFG_SUCCESS"})
+
+    async def _rsa_key(self, request):
+        # Responses are stored decrypted, the replay never encrypts
+        return web.json_response({"RSAPublicKey": None})
+
+    async def _login(self, request):
+        return web.json_response({"result": "ZCFG_SUCCESS", "sessionkey": "replay"})
+
+    async def _success(self, request):
+        return web.json_response({"result": "ZCFG_SUCCESS"})
+
+    async def _object(self, request):
+        self.requests += 1
+        records = self._records.get(request.query.get("oid"))
+        if records is None:
+            raise web.HTTPNotFound()
+        record = next(records)
+        if self.speed:
+            await asyncio.sleep(record["elapsed_ms"] / 1000 * self.speed)
+        if record["status"] != 200 or record["response"] is None:
+            # Timeouts and connection errors have no status, a gateway timeout is the closest
+            return web.Response(status=record["status"] or 504)
+        return web.json_response(record["response"])
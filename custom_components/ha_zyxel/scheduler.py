@@ -0,0 +1,131 @@
+"""Staggered poll scheduling across all Zyxel config entries."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import *
+
+if TYPE_CHECKING:
+    from .coordinator import ZyxelDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Drive the polls of every entry, spreading their phases over the interval.
+
+    Without it every coordinator polls on its own timer, and after a restart
+    all routers poll (and decrypt) in lockstep. Entry i of n polls at
+    i/n of its interval, plus a little jitter, and all routers share a
+    limit of concurrent in-flight requests.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # Shared by the clients of all entries
+        self.limiter = asyncio.Semaphore(GLOBAL_MAX_CONCURRENT)
+        self._origin = hass.loop.time()
+        self._coordinators: dict[str, ZyxelDataUpdateCoordinator] = {}
+        self._handles: dict[str, asyncio.TimerHandle] = {}
+        self._offsets: dict[str, float] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        # Entries whose first refresh is still to be started
+        self._first_polls: set[str] = set()
+
+    @callback
+    def async_register(self, coordinator: ZyxelDataUpdateCoordinator, refresh: bool = False) -> CALLBACK_TYPE:
+        """Start polling coordinator, return the callback that stops it.
+
+        With refresh, the first poll is not left to the next tick of the grid but
+        starts at the phase of the entry in the startup window.
+        """
+        entry_id = coordinator.entry.entry_id
+        self._coordinators[entry_id] = coordinator
+        if refresh:
+            self._first_polls.add(entry_id)
+        self.async_reschedule()
+
+        @callback
+        def unregister() -> None:
+            self._coordinators.pop(entry_id, None)
+            self._offsets.pop(entry_id, None)
+            self._refreshing.pop(entry_id, None)
+            self._first_polls.discard(entry_id)
+            if handle := self._handles.pop(entry_id, None):
+                handle.cancel()
+            self.async_reschedule()
+
+        return unregister
+
+    @callback
+    def async_reschedule(self) -> None:
+        """Spread the phases again, after an entry or an interval changed."""
+        count = len(self._coordinators)
+        for index, entry_id in enumerate(sorted(self._coordinators)):
+            coordinator = self._coordinators[entry_id]
+            interval = coordinator.poll_interval
+            # Jitter within a tenth of the slot, so that the slots don't overlap
+            jitter = random.uniform(0, min(POLL_JITTER, interval / count / 10))
+            self._offsets[entry_id] = interval * index / count + jitter
+            self._schedule(entry_id)
+
+    @callback
+    def async_start_poll(self, coordinator: ZyxelDataUpdateCoordinator) -> asyncio.Task | None:
+        """Start a refresh of coordinator, unless one is still running."""
+        entry_id = coordinator.entry.entry_id
+        running = self._refreshing.get(entry_id)
+        if running is not None and not running.done():
+            return None
+        task = coordinator.entry.async_create_background_task(
+            self.hass, coordinator.async_refresh(), f"{DOMAIN}_poll_{entry_id}"
+        )
+        self._refreshing[entry_id] = task
+        return task
+
+    async def async_wait_idle(self, coordinator: ZyxelDataUpdateCoordinator) -> None:
+        """Wait until no refresh of coordinator is running."""
+        entry_id = coordinator.entry.entry_id
+        while (running := self._refreshing.get(entry_id)) is not None and not running.done():
+            await asyncio.wait([running])
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel all the scheduled polls."""
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+        self._coordinators.clear()
+
+    @callback
+    def _schedule(self, entry_id: str, now: float | None = None) -> None:
+        if handle := self._handles.pop(entry_id, None):
+            handle.cancel()
+        interval = self._coordinators[entry_id].poll_interval
+        offset = self._offsets[entry_id]
+        if now is None:
+            now = self.hass.loop.time()
+        # Next time of the grid origin + offset + k * interval after now
+        ticks = (now - self._origin - offset) // interval + 1
+        when = self._origin + offset + ticks * interval
+        if entry_id in self._first_polls:
+            # The same phase within the startup window, at once for an entry set up later
+            window = min(interval, FIRST_POLL_WINDOW)
+            when = min(when, max(self._origin + window * offset / interval, now))
+        self._handles[entry_id] = self.hass.loop.call_at(when, self._fire, entry_id)
+
+    @callback
+    def _fire(self, entry_id: str) -> None:
+        coordinator = self._coordinators.get(entry_id)
+        if coordinator is None:
+            return
+        self._first_polls.discard(entry_id)
+        if self.async_start_poll(coordinator) is None:
+            # The previous poll overran its slot, skip this one
+            _LOGGER.debug("Zyxel poll of %s still running, skipping", coordinator.entry.title)
+        # Half an interval ahead, the timer may fire a little early
+        self._schedule(entry_id, self.hass.loop.time() + coordinator.poll_interval / 2)
@@ -3,14 +3,14 @@ from __future__ import annotations
 
 import logging
 from typing import Any
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.const import UnitOfInformation
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -21,6 +21,8 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import *
 from .coordinator import ZyxelDataUpdateCoordinator
 from .entity import ZyxelBaseEntity
+from .counters import traffic_counter
+from .usage import DIRECTIONS, PERIODS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,8 +38,19 @@ async def async_setup_entry(
 
     sensors = []
     sensors.append(LastRestartSensor(coordinator))
+    if "cellular.INTF_Cell_ID" in coordinator.data or "cellular.INTF_PhyCell_ID" in coordinator.data:
+        sensors.append(HandoverCountSensor(coordinator, "hour", 3600))
+        sensors.append(HandoverCountSensor(coordinator, "day", 86400))
+
+    # Interfaces as the usage tracker names them, dotted ones (ptm0.1) included
+    interfaces = {counter[0] for counter in map(traffic_counter, coordinator.data) if counter}
+    for interface in sorted(interfaces):
+        for period in PERIODS:
+            for direction in DIRECTIONS:
+                sensors.append(DataUsageSensor(coordinator, interface, period, direction))
 
     configs_used = []
+    known_sensors = get_known_sensors()
 
     # Process all keys in the JSON and create sensors for them
     # We'll use a flat structure for simplicity
@@ -47,9 +60,12 @@ async def async_setup_entry(
             continue
 
         # Check if this is a known sensor type
-        sensor_config = KNOWN_SENSORS.get(key, KNOWN_SENSORS.get(key.split(".")[-1], None))
+        sensor_config = known_sensors.get(key, known_sensors.get(key.split(".")[-1], None))
 
-        if not sensor_config:
+        # Copy, the known table is cached and shared between entries
+        if sensor_config:
+            sensor_config = dict(sensor_config)
+        else:
             sensor_config = { "icon": "mdi:router-wireless" }
         #if name used multiple times, use only the first time
         if 'name' in sensor_config and sensor_config['name']:
@@ -82,7 +98,7 @@ class ZyxelSensorEntity(ZyxelBaseEntity, SensorEntity):
         except (KeyError, AttributeError):
             return None
 
-class LastRestartSensor(RestoreEntity, ZyxelBaseEntity, SensorEntity):
+class LastRestartSensor(ZyxelBaseEntity, SensorEntity):
     """Sensor that shows the date/time of the last reboot."""
 
     def __init__(self, coordinator):        
@@ -92,40 +108,89 @@ class LastRestartSensor(RestoreEntity, ZyxelBaseEntity, SensorEntity):
         self._attr_device_class = "timestamp"
         self._attr_icon = "mdi:clock-check"
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
-        self._last_restart = None
-        self._last_uptime = None
-
-
-    async def async_added_to_hass(self):
-        """Called when added to Home Assistant."""
-        await super().async_added_to_hass()
-        if (last_state := await self.async_get_last_state()) is not None:
-            # Get status (date)
-            if last_state.state and last_state.state != "unknown":
-                try:
-                    self._last_restart = datetime.fromisoformat(last_state.state)                    
-                    # Get attributes
-                    attrs = last_state.attributes
-                    self._last_uptime = int(float(attrs["uptime"]))
-                except ValueError:
-                    self._last_restart = None
 
     @property
     def native_value(self):
-        try:
-            uptime = self._get_value_from_path() or self._last_uptime
-            if not self._last_restart or uptime < self._last_uptime:
-                self._last_uptime = uptime
-                self._last_restart = datetime.now(timezone.utc) - timedelta(seconds=uptime)
-                self.async_write_ha_state()
-            return self._last_restart
-        except (KeyError, AttributeError):
-            return None
+        # Tracked (and persisted) by the coordinator, once per refresh
+        return self.coordinator.last_restart
             
     @property
     def extra_state_attributes(self):
         """Add extra attributes"""
-        return { "uptime": self._last_uptime }
+        attrs = super().extra_state_attributes or {}
+        return { **attrs, "uptime": self.coordinator.uptime }
+
+class HandoverCountSensor(ZyxelBaseEntity, SensorEntity):
+    """Number of serving cell handovers over the last hour or day."""
+
+    def __init__(self, coordinator, period: str, seconds: int):
+        super().__init__(coordinator, f"handovers_{period}", None)
+        self._attr_name = f"Cell handovers (last {period})"
+        self._attr_icon = "mdi:swap-horizontal"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = "handovers"
+        self._seconds = seconds
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return bool(self.coordinator.data) and not self.coordinator.is_expired("cellular")
+
+    @property
+    def native_value(self):
+        return self.coordinator.handovers.count_since(self._seconds)
+
+    @property
+    def extra_state_attributes(self):
+        """Add the latest handover."""
+        history = self.coordinator.handovers.history
+        if not history:
+            return None
+        last = history[-1]
+        return {
+            "last_handover": datetime.fromtimestamp(last["ts"], timezone.utc).isoformat(),
+            "serving_cell": last["new_cell_id"],
+            "band": last["new_band"],
+        }
+
+
+class DataUsageSensor(ZyxelBaseEntity, SensorEntity):
+    """Bytes received or sent by an interface today or in the billing cycle."""
+
+    def __init__(self, coordinator, interface: str, period: str, direction: str):
+        super().__init__(coordinator, f"usage_{period}_{interface}_{direction}", None)
+        label = "today" if period == "day" else "this billing cycle"
+        self._attr_name = f"{interface} {'received' if direction == 'rx' else 'sent'} {label}"
+        self._attr_icon = "mdi:download" if direction == "rx" else "mdi:upload"
+        self._attr_device_class = SensorDeviceClass.DATA_SIZE
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfInformation.BYTES
+        self._attr_suggested_unit_of_measurement = UnitOfInformation.MEGABYTES
+        self._interface = interface
+        self._period = period
+        self._direction = direction
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        # The totals are kept across polls, even while the traffic is not answering
+        return self._period in self.coordinator.usage.periods
+
+    @property
+    def native_value(self):
+        return self.coordinator.usage.total(self._period, self._interface, self._direction)
+
+    @property
+    def extra_state_attributes(self):
+        """Add the start and the total of the previous period."""
+        usage = self.coordinator.usage
+        if self._period not in usage.periods:
+            return None
+        return {
+            "period_start": usage.periods[self._period]["start"],
+            "previous_period": usage.previous_total(self._period, self._interface, self._direction),
+        }
+
 
 def _is_value_scalar(value: Any) -> bool:
     """Check if a value is a scalar (string, number, bool)."""
@@ -0,0 +1,45 @@
+"""Services of the Zyxel integration."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_CONFIG_ENTRY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import *
+
+PROFILE_POLL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CPROFILE, default=False): cv.boolean,
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_profile_poll(call: ServiceCall) -> ServiceResponse:
+        """Run one instrumented refresh of a router."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        entries = [
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED and (entry_id is None or entry.entry_id == entry_id)
+        ]
+        if not entries:
+            raise ServiceValidationError("No loaded Zyxel entry matches")
+        if len(entries) > 1:
+            raise ServiceValidationError(f"Several Zyxel entries are loaded, set {ATTR_CONFIG_ENTRY_ID}")
+        return await entries[0].runtime_data.async_profile_poll(call.data[ATTR_CPROFILE])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_POLL,
+        async_profile_poll,
+        schema=PROFILE_POLL_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,170 @@
+"""Hourly long-term statistics of signal and traffic metrics."""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import *
+
+_LOGGER = logging.getLogger(__name__)
+
+# Flattened cellular key -> (statistic suffix, name, unit)
+SIGNAL_STATISTICS = {
+    "INTF_RSRP": ("rsrp", "RSRP", "dBm"),
+    "INTF_RSRQ": ("rsrq", "RSRQ", "dB"),
+    "INTF_SINR": ("sinr", "SINR", "dB"),
+    "INTF_RSSI": ("rssi", "RSSI", "dBm"),
+}
+
+# Traffic_Status interface counter -> (direction, name)
+TRAFFIC_STATISTICS = {
+    "BytesReceived": ("rx", "receive rate"),
+    "BytesSent": ("tx", "transmit rate"),
+}
+
+
+class StatisticsAggregator:
+    """Aggregate samples into hourly mean/min/max and import them as external statistics.
+
+    The signal entities can then be excluded from the recorder, the hourly
+    rows are written once per hour instead of a state row per poll. The hour
+    in progress is persisted, a restart within the hour goes on with it.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._prefix = f"{DOMAIN}:{entry.entry_id.lower()}"
+        self._bucket_start: datetime | None = None
+        # statistic suffix -> [name, unit, count, total, min, max]
+        self._bucket: dict[str, list] = {}
+        # interface counter -> (value, monotonic time) of the previous poll, for the rates
+        self._counters: dict[str, tuple[float, float]] = {}
+        self._next_save = 0.0
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.statistics")
+
+    async def async_load(self) -> None:
+        """Restore the hour in progress, an hour already over is imported on the next poll."""
+        stored = await self._store.async_load()
+        if stored and stored.get("start"):
+            self._bucket_start = dt_util.parse_datetime(stored["start"])
+            self._bucket = stored.get("bucket", {})
+
+    async def async_save(self) -> None:
+        """Write the hour in progress now, e.g. on shutdown."""
+        await self._store.async_save(self._data_to_store())
+
+    def _data_to_store(self) -> dict:
+        return {
+            "start": self._bucket_start.isoformat() if self._bucket_start else None,
+            "bucket": self._bucket,
+        }
+
+    @callback
+    def async_update(self, data: dict, groups: set[str]) -> None:
+        """Add the samples of a poll, importing the previous hour once it is over."""
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if self._bucket_start != hour:
+            self.async_flush()
+            self._bucket_start = hour
+
+        now = time.monotonic()
+        for key, value in data.items():
+            group, _, name = key.partition(".")
+            if group not in groups:
+                continue
+            if group == "cellular" and name in SIGNAL_STATISTICS:
+                suffix, label, unit = SIGNAL_STATISTICS[name]
+                self._add(suffix, label, unit, value)
+            elif group == "traffic":
+                interface, _, counter = name.rpartition(".")
+                if counter not in TRAFFIC_STATISTICS:
+                    continue
+                direction, label = TRAFFIC_STATISTICS[counter]
+                rate = self._rate(key, value, now)
+                if rate is not None:
+                    self._add(f"{_slug(interface)}_{direction}_rate", f"{interface} {label}", "B/s", rate)
+
+        # A write every STATISTICS_SAVE_DELAY at most, delaying it again on every poll would never write
+        if now >= self._next_save:
+            self._store.async_delay_save(self._data_to_store, STATISTICS_SAVE_DELAY)
+            self._next_save = now + STATISTICS_SAVE_DELAY
+
+    @callback
+    def reset_counters(self) -> None:
+        """Forget the counter baselines, e.g. after a router reboot."""
+        self._counters.clear()
+
+    def _rate(self, key, value, now) -> float | None:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        previous = self._counters.get(key)
+        self._counters[key] = (value, now)
+        # No baseline yet, or the counter was reset
+        if previous is None or value < previous[0] or now <= previous[1]:
+            return None
+        return (value - previous[0]) / (now - previous[1])
+
+    def _add(self, suffix, name, unit, value) -> None:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        stat = self._bucket.get(suffix)
+        if stat is None:
+            self._bucket[suffix] = [name, unit, 1, value, value, value]
+            return
+        stat[2] += 1
+        stat[3] += value
+        stat[4] = min(stat[4], value)
+        stat[5] = max(stat[5], value)
+
+    @callback
+    def async_flush(self, keep: bool = False) -> None:
+        """Import the current bucket, a partial hour is overwritten if imported again.
+
+        With keep the bucket stays, to go on with it after a restart within the hour.
+        """
+        if not self._bucket or self._bucket_start is None:
+            return
+        if "recorder" not in self.hass.config.components:
+            if not keep:
+                self._bucket = {}
+            return
+
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        for suffix, (name, unit, count, total, minimum, maximum) in self._bucket.items():
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{self.entry.title} {name}",
+                source=DOMAIN,
+                statistic_id=f"{self._prefix}_{suffix}",
+                unit_of_measurement=unit,
+            )
+            try:
+                # Newer recorders describe the mean with mean_type
+                from homeassistant.components.recorder.models import StatisticMeanType
+                metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+            except ImportError:
+                pass
+            statistic = StatisticData(start=self._bucket_start, mean=total / count, min=minimum, max=maximum)
+            async_add_external_statistics(self.hass, metadata, [statistic])
+        _LOGGER.debug("Imported Zyxel statistics of %s: %s", self._bucket_start, list(self._bucket))
+        if not keep:
+            self._bucket = {}
+            self._store.async_delay_save(self._data_to_store, STATISTICS_SAVE_DELAY)
+
+
+def _slug(value: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in value.lower())
@@ -0,0 +1,119 @@
+"""Persisted daily and billing cycle data usage of each interface."""
+from __future__ import annotations
+
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import *
+from .counters import counter_increment, cycle_start, traffic_counter
+
+_LOGGER = logging.getLogger(__name__)
+
+DIRECTIONS = ("rx", "tx")
+PERIODS = ("day", "month")
+
+
+class UsageTracker:
+    """Accumulate the rx/tx bytes of each interface into daily and monthly totals.
+
+    The router counters restart from zero on reboot and may wrap around, so
+    the totals are built from the increments between two polls. The month is
+    the billing cycle, starting on billing_day.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, billing_day: int = 1) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.billing_day = billing_day
+        # "interface.direction" -> counter value of the previous poll
+        self._counters: dict[str, int] = {}
+        # period -> {"start": iso date, "totals": {interface: [rx, tx]}, "previous": {...}}
+        self.periods: dict[str, dict] = {}
+        # Set on reboot, the next counters count from zero
+        self._restarted = False
+        self._next_save = 0.0
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.usage")
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if stored:
+            self._counters = stored.get("counters", {})
+            self.periods = stored.get("periods", {})
+
+    async def async_save(self) -> None:
+        """Write the totals now, e.g. before the entry is unloaded."""
+        await self._store.async_save(self._data_to_store())
+
+    def _data_to_store(self) -> dict:
+        return {"counters": self._counters, "periods": self.periods}
+
+    @callback
+    def reset_counters(self) -> None:
+        """Count the next counters from zero, after a router reboot."""
+        self._restarted = True
+
+    @callback
+    def async_update(self, data: dict) -> None:
+        """Add the traffic since the previous poll to the current periods."""
+        self._roll_periods()
+        restarted, self._restarted = self._restarted, False
+        for key, value in data.items():
+            counter = traffic_counter(key)
+            if counter is None:
+                continue
+            interface, direction = counter
+            try:
+                value = int(float(value))
+            except (TypeError, ValueError):
+                continue
+            previous = self._counters.get(f"{interface}.{direction}")
+            self._counters[f"{interface}.{direction}"] = value
+            if previous is None:
+                # First sample, only a baseline
+                continue
+            delta = counter_increment(previous, value, restarted)
+            if delta:
+                index = DIRECTIONS.index(direction)
+                for period in PERIODS:
+                    self.periods[period]["totals"].setdefault(interface, [0, 0])[index] += delta
+
+        # A write every USAGE_SAVE_DELAY at most, delaying it again on every poll would never write
+        now = time.monotonic()
+        if now >= self._next_save:
+            self._store.async_delay_save(self._data_to_store, USAGE_SAVE_DELAY)
+            self._next_save = now + USAGE_SAVE_DELAY
+
+    def _roll_periods(self) -> None:
+        today = dt_util.now().date()
+        starts = {"day": today, "month": cycle_start(today, self.billing_day)}
+        for period, start in starts.items():
+            current = self.periods.get(period)
+            if current is not None and current["start"] == start.isoformat():
+                continue
+            self.periods[period] = {
+                "start": start.isoformat(),
+                "totals": {},
+                "previous": current["totals"] if current else None,
+            }
+            if current is not None:
+                _LOGGER.debug("Zyxel %s usage of %s: %s", period, current["start"], current["totals"])
+
+    def total(self, period: str, interface: str, direction: str) -> int:
+        """Return the bytes of interface in the current period."""
+        current = self.periods.get(period)
+        if current is None:
+            return 0
+        return current["totals"].get(interface, [0, 0])[DIRECTIONS.index(direction)]
+
+    def previous_total(self, period: str, interface: str, direction: str) -> int | None:
+        """Return the bytes of interface in the previous period, if known."""
+        current = self.periods.get(period)
+        if current is None or current["previous"] is None:
+            return None
+        return current["previous"].get(interface, [0, 0])[DIRECTIONS.index(direction)]
+
@@ -0,0 +1,18 @@
+"""Load the integration modules that do not need Home Assistant.
+
+The package __init__ imports Home Assistant, so the modules are loaded by
+path instead of through custom_components.ha_zyxel.
+"""
+import importlib.util
+from pathlib import Path
+
+INTEGRATION = Path(__file__).parent.parent / "custom_components" / "ha_zyxel"
+
+
+def load_module(name):
+    """Load the module at name, a path relative to the integration ("flattener", "nr7101/redact")."""
+    module_name = "ha_zyxel_" + name.replace("/", "_")
+    spec = importlib.util.spec_from_file_location(module_name, INTEGRATION / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from conftest import load_module
+
+counters = load_module("counters")
+
+
+def test_increment_of_a_growing_counter():
+    assert counters.counter_increment(1000, 1500, False) == 500
+    assert counters.counter_increment(1000, 1000, False) == 0
+
+
+def test_increment_across_a_32_bit_wrap():
+    assert counters.counter_increment(2 ** 32 - 100, 50, False) == 150
+    assert counters.counter_increment(2 ** 31, 0, False) == 2 ** 31
+
+
+def test_increment_after_a_reset():
+    # Too low in the 32 bit range, or past it, for a wrap: counting from zero again
+    assert counters.counter_increment(2 ** 31 - 1, 50, False) == 50
+    assert counters.counter_increment(2 ** 40, 50, False) == 50
+    # A reboot counts from zero even when the counter is still above the previous value
+    assert counters.counter_increment(1000, 5000, True) == 5000
+
+
+@pytest.mark.parametrize(
+    "today, billing_day, start",
+    [
+        (date(2026, 3, 15), 1, date(2026, 3, 1)),
+        (date(2026, 3, 15), 15, date(2026, 3, 15)),
+        (date(2026, 3, 14), 15, date(2026, 2, 15)),
+        (date(2026, 1, 10), 20, date(2025, 12, 20)),
+        # Past the end of a short month, the cycle starts on its last day
+        (date(2026, 2, 28), 31, date(2026, 2, 28)),
+        (date(2024, 2, 29), 30, date(2024, 2, 29)),
+        (date(2026, 3, 5), 31, date(2026, 2, 28)),
+        (date(2026, 3, 31), 31, date(2026, 3, 31)),
+        (date(2026, 5, 1), 31, date(2026, 4, 30)),
+    ],
+)
+def test_cycle_start(today, billing_day, start):
+    assert counters.cycle_start(today, billing_day) == start
+
+
+@pytest.mark.parametrize(
+    "key, counter",
+    [
+        ("traffic.wwan0.BytesReceived", ("wwan0", "rx")),
+        ("traffic.wwan0.BytesSent", ("wwan0", "tx")),
+        # Dotted interface names of the VMG models stay whole and apart
+        ("traffic.ptm0.1.BytesSent", ("ptm0.1", "tx")),
+        ("traffic.ptm0.2.BytesSent", ("ptm0.2", "tx")),
+        ("traffic.eth4.1.BytesReceived", ("eth4.1", "rx")),
+        ("traffic.wwan0.PacketsSent", None),
+        ("traffic.BytesSent", None),
+        ("cellular.wwan0.BytesSent", None),
+    ],
+)
+def test_traffic_counter(key, counter):
+    assert counters.traffic_counter(key) == counter
@@ -0,0 +1,62 @@
+from conftest import load_module
+
+flattener = load_module("flattener")
+
+
+def _cellular(*bands):
+    return {
+        "cellular": {
+            "INTF_RSRP": -90,
+            "SCC_Info": [{"Band": band, "RSRP": -100} for band in bands],
+        },
+        "device": {"DeviceInfo": {"ModelName": "NR7101", "UpTime": 100}},
+    }
+
+
+def test_plan_is_reused_while_the_shape_holds():
+    f = flattener.SnapshotFlattener(["cellular.SCC_Info"])
+    f.flatten(_cellular("B7"))
+    flat = f.flatten(_cellular("B20"))
+    assert f.compiles == 2  # one plan per group
+    assert flat["cellular.SCC_Info.0.Band"] == "B20"
+    assert flat["device.DeviceInfo.ModelName"] == "NR7101"
+
+
+def test_plan_is_compiled_again_when_a_list_length_changes():
+    f = flattener.SnapshotFlattener(["cellular.SCC_Info"])
+    f.flatten(_cellular("B7"))
+    flat = f.flatten(_cellular("B7", "B20"))
+    assert f.compiles == 3
+    assert flat["cellular.SCC_Info.1.Band"] == "B20"
+
+    # Back to a single carrier, no key of the longer list is left behind
+    flat = f.flatten(_cellular("B7"))
+    assert f.compiles == 4
+    assert "cellular.SCC_Info.1.Band" not in flat
+    assert flat == {
+        "cellular.INTF_RSRP": -90,
+        "cellular.SCC_Info.0.Band": "B7",
+        "cellular.SCC_Info.0.RSRP": -100,
+        "device.DeviceInfo.ModelName": "NR7101",
+        "device.DeviceInfo.UpTime": 100,
+    }
+
+
+def test_plan_is_compiled_again_when_a_shape_changes():
+    f = flattener.SnapshotFlattener()
+    f.flatten({"device": {"DeviceInfo": {"ModelName": "NR7101"}}})
+
+    # A new key, then a value turning into an object
+    flat = f.flatten({"device": {"DeviceInfo": {"ModelName": "NR7101"}, "ProcessStatus": {"CPUUsage": 5}}})
+    assert f.compiles == 2
+    assert flat["device.ProcessStatus.CPUUsage"] == 5
+
+    flat = f.flatten({"device": {"DeviceInfo": {"ModelName": {"Name": "NR7101"}}, "ProcessStatus": {"CPUUsage": 5}}})
+    assert f.compiles == 3
+    assert flat == {"device.DeviceInfo.ModelName.Name": "NR7101", "device.ProcessStatus.CPUUsage": 5}
+
+
+def test_lists_not_expanded_are_kept_as_values():
+    f = flattener.SnapshotFlattener()
+    flat = f.flatten(_cellular("B7", "B20"))
+    assert flat["cellular.SCC_Info"] == [{"Band": "B7", "RSRP": -100}, {"Band": "B20", "RSRP": -100}]
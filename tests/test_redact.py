@@ -0,0 +1,78 @@
+import pytest
+
+from conftest import load_module
+
+redact = load_module("nr7101/redact")
+
+REDACTED = redact.REDACTED
+
+
+def test_sensitive_keys_are_masked():
+    data = {
+        "INTF_IMEI": "356789012345678",
+        "INTF_IMSI": "208011234567890",
+        "X_ZYXEL_ICCID": "8933011234567890123",
+        "SerialNumber": "S123456789",
+        "SSID": "home",
+        "AdminPassword": "secret",
+        "sessionkey": "abc",
+        "PhoneNumber": "0612345678",
+    }
+    assert redact.redact(data) == {key: REDACTED for key in data}
+
+
+def test_empty_sensitive_values_are_kept():
+    assert redact.redact({"SSID": "", "INTF_IMEI": None}) == {"SSID": "", "INTF_IMEI": None}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("AA:BB:CC:DD:EE:FF", REDACTED),
+        ("lease of aa-bb-cc-dd-ee-ff", f"lease of {REDACTED}"),
+        ("+447911123456", REDACTED),
+        ("call +33 6 12 34 56 78", f"call {REDACTED}"),
+    ],
+)
+def test_macs_and_international_numbers_are_masked_anywhere(text, expected):
+    assert redact.redact({"Description": text}) == {"Description": expected}
+
+
+def test_sms_senders_and_texts_are_masked():
+    data = {
+        "SMS_UsedSpace": 2,
+        "SMS_List": [
+            {"SMS_ID": 1, "SMS_From": "0612345678", "SMS_Content": "your code is 1234"},
+            {"SMS_ID": 2, "SMS_Sender": "0033612345678", "SMS_Text": "hello"},
+        ],
+    }
+    assert redact.redact(data) == {
+        "SMS_UsedSpace": 2,
+        "SMS_List": [
+            {"SMS_ID": 1, "SMS_From": REDACTED, "SMS_Content": REDACTED},
+            {"SMS_ID": 2, "SMS_Sender": REDACTED, "SMS_Text": REDACTED},
+        ],
+    }
+
+
+def test_sms_flag_masks_national_numbers_in_any_field():
+    # The history and capture redact the object of cellwan_sms with sms set
+    data = {"Inbox": [{"Index": 1, "Status": "from 06 12 34 56 78"}, {"Index": 2, "Status": "00441234567890"}]}
+    assert redact.redact(data, sms=True) == {
+        "Inbox": [{"Index": 1, "Status": f"from {REDACTED}"}, {"Index": 2, "Status": REDACTED}],
+    }
+
+
+def test_values_that_are_not_sensitive_are_kept():
+    data = {
+        "INTF_Cell_ID": "01234567",
+        "uptime": "0123456",
+        "X_ZYXEL_IfName": "ptm0.1",
+        "IPAddress": "10.0.0.1",
+        "INTF_RSRP": -90,
+        "BytesSent": 1700000000,
+        "Time": "2026-10-19 12:00:00",
+        "INTF_Current_Band": "B3",
+        "SMS_UsedSpace": 2,
+    }
+    assert redact.redact(data) == data